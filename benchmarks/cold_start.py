@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for both entry points
+
+Every measurement runs in a fresh interpreter, so nothing is already
+imported. Results are compared against a budget file and the script
+exits non-zero when a budget is exceeded or a heavy dependency is
+imported before it is needed.
+
+Usage:
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 9 --json results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(ROOT, 'benchmarks', 'cold_start_budget.json')
+
+# Modules whose import cost the entry points pay up front
+MODULES = ('weather_api', 'weather_app', 'streamlit_weather_app')
+
+# Heavy dependencies to report as loaded after a plain import
+HEAVY_MODULES = ('numpy', 'pandas', 'plotly.graph_objects', 'plotly.express', 'PIL.Image', 'PIL.ImageTk')
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{'ms': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+# Sample-data mode: the page as a first-time visitor without an API key sees it
+STREAMLIT_PROBE = """
+import json, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file('streamlit_weather_app.py', default_timeout=60)
+started = time.perf_counter()
+app.run()
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({'ms': elapsed, 'errors': [str(e.value) for e in app.exception]}))
+"""
+
+TK_PROBE = """
+import json, time
+started = time.perf_counter()
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError:
+    print(json.dumps({'ms': None}))
+    raise SystemExit
+import weather_app
+app = weather_app.WeatherApp(root)
+root.update()
+elapsed = (time.perf_counter() - started) * 1000
+root.destroy()
+print(json.dumps({'ms': elapsed}))
+"""
+
+
+def run_probe(code: str) -> Dict:
+    """
+    Run a probe script in a fresh interpreter
+
+    Args:
+        code: Python source printing one JSON line
+
+    Returns:
+        The decoded JSON result
+    """
+    env = dict(os.environ, WEATHER_PREWARM_ICONS='0', WEATHER_PINNED_CITIES='', PYTHONWARNINGS='ignore')
+    completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                               capture_output=True, text=True, timeout=300)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        raise Exception(f"Probe failed: {completed.stderr.strip()[-500:]}")
+    return json.loads(lines[-1])
+
+
+def median_ms(samples: List[Dict]) -> Optional[float]:
+    values = [sample['ms'] for sample in samples if sample['ms'] is not None]
+    return statistics.median(values) if values else None
+
+
+def measure(runs: int = 5) -> Dict:
+    """
+    Measure import times, Streamlit first paint and Tk first window
+
+    Args:
+        runs: Fresh interpreters per measurement (the median is reported)
+
+    Returns:
+        Dictionary with 'timings' (metric -> ms, None if unavailable) and
+        'loaded' (module -> heavy dependencies present after importing it)
+    """
+    timings = {}
+    loaded = {}
+
+    for module in MODULES:
+        samples = [run_probe(IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)) for _ in range(runs)]
+        timings[f'import:{module}'] = median_ms(samples)
+        loaded[module] = samples[0]['loaded']
+
+    samples = [run_probe(STREAMLIT_PROBE) for _ in range(runs)]
+    errors = samples[0]['errors']
+    if errors:
+        raise Exception(f"Streamlit app failed: {errors}")
+    timings['streamlit:first_paint'] = median_ms(samples)
+
+    samples = [run_probe(TK_PROBE) for _ in range(runs)]
+    timings['tk:first_window'] = median_ms(samples)
+
+    return {'timings': timings, 'loaded': loaded}
+
+
+def check_budget(results: Dict, budget: Dict) -> List[str]:
+    """
+    Compare results with a budget
+
+    Args:
+        results: Output of measure()
+        budget: {'timings_ms': {metric: max ms}, 'forbidden_modules': {module: [names]}}
+
+    Returns:
+        List of violation messages (empty when within budget)
+    """
+    violations = []
+
+    for metric, limit in budget.get('timings_ms', {}).items():
+        value = results['timings'].get(metric)
+        if value is not None and value > limit:
+            violations.append(f"{metric}: {value:.0f} ms exceeds budget of {limit} ms")
+
+    for module, forbidden in budget.get('forbidden_modules', {}).items():
+        for name in set(forbidden) & set(results['loaded'].get(module, [])):
+            violations.append(f"import {module} loads {name} eagerly")
+
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark with a regression budget")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument('--budget', default=DEFAULT_BUDGET, help="budget JSON file")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+
+    print(f"{'metric':<36}{'median ms':>12}")
+    for metric, value in results['timings'].items():
+        print(f"{metric:<36}{'skipped' if value is None else f'{value:.1f}':>12}")
+    for module, names in results['loaded'].items():
+        print(f"{module} loads: {', '.join(names) or 'no heavy dependencies'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    with open(args.budget) as f:
+        violations = check_budget(results, json.load(f))
+
+    for violation in violations:
+        print(f"BUDGET EXCEEDED: {violation}")
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the formatting and aggregation hot paths
+
+Runs WeatherAPI's formatters and daily aggregation, plus the Streamlit
+forecast view and chart builders, on recorded OpenWeatherMap payloads
+(benchmarks/fixtures) re-targeted to 1 - 10,000 cities. Reports
+throughput, per-call latency percentiles and tracemalloc peak memory,
+and fails when results regress against the stored baseline.
+
+Usage:
+    python benchmarks/hotpaths.py
+    python benchmarks/hotpaths.py --cities 1,100 --only format_
+    python benchmarks/hotpaths.py --runs 3 --save-baseline
+    python benchmarks/hotpaths.py --synthetic 1 --cities 100,10000
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from weather_api import WeatherAPI  # noqa: E402
+
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'hotpaths_baseline.json')
+DEFAULT_CITIES = (1, 10, 100, 1000, 10000)
+
+
+class FixtureCities:
+    """Recorded London payloads re-targeted to any number of cities"""
+
+    def __init__(self, fixture_dir: str = FIXTURE_DIR):
+        with open(os.path.join(fixture_dir, 'weather_london.json')) as f:
+            self.weather_fixture = json.load(f)
+        with open(os.path.join(fixture_dir, 'forecast_london.json')) as f:
+            self.forecast_fixture = json.load(f)
+        with open(os.path.join(ROOT, 'data', 'cities.csv'), newline='', encoding='utf-8') as f:
+            self.places = [(row['name'], row['country'], float(row['lat']), float(row['lon']))
+                           for row in csv.DictReader(f)]
+
+    def place(self, i: int):
+        """Name, country, coordinates and temperature shift of city i"""
+        name, country, lat, lon = self.places[i % len(self.places)]
+        if i >= len(self.places):
+            name = f"{name} {i // len(self.places)}"
+        shift = round((40 - abs(lat)) * 0.4 + (i % 7) * 0.3, 2)
+        return name, country, lat, lon, shift
+
+    @staticmethod
+    def _shift_main(main: Dict, shift: float) -> Dict:
+        main = dict(main)
+        for key in ('temp', 'feels_like', 'temp_min', 'temp_max'):
+            main[key] = round(main[key] + shift, 2)
+        return main
+
+    def weather(self, i: int) -> Dict:
+        """Current weather payload for city i"""
+        name, country, lat, lon, shift = self.place(i)
+        data = dict(self.weather_fixture)
+        data.update(name=name, id=i, coord={'lat': lat, 'lon': lon},
+                    main=self._shift_main(data['main'], shift),
+                    sys=dict(data['sys'], country=country))
+        return data
+
+    def forecast(self, i: int) -> Dict:
+        """Forecast payload for city i (unchanged nested objects are shared)"""
+        name, country, lat, lon, shift = self.place(i)
+        data = dict(self.forecast_fixture)
+        data['city'] = dict(data['city'], id=i, name=name, country=country, coord={'lat': lat, 'lon': lon})
+        data['list'] = [dict(step, main=self._shift_main(step['main'], shift)) for step in data['list']]
+        return data
+
+
+class SyntheticCities:
+    """Generated payloads (weather_synthetic) with varied weather per city"""
+
+    def __init__(self, cities: int, seed: int = 0):
+        from weather_synthetic import generate_forecast
+
+        # A fixed start keeps runs with the same seed identical
+        self.forecasts = generate_forecast(cities, seed=seed, start=1720537200)
+
+    def weather(self, i: int) -> Dict:
+        """Current weather payload for city i"""
+        return self.forecasts.weather_payload(i)
+
+    def forecast(self, i: int) -> Dict:
+        """Forecast payload for city i"""
+        return self.forecasts.payload(i)
+
+
+class Benchmark:
+    """One hot path: inputs are prepared untimed, then run() is timed per city"""
+
+    def __init__(self, name: str, prepare: Callable, run: Callable,
+                 max_cities: Optional[int] = None, batch: bool = False):
+        """
+        Args:
+            name: Benchmark name
+            prepare: prepare(i) -> input for city i, or prepare(n) -> one
+                     input for all n cities when batch is set
+            run: The measured call
+            max_cities: Skip larger city counts (for slow paths)
+            batch: Time one call over all cities instead of one per city
+        """
+        self.name = name
+        self.prepare = prepare
+        self.run = run
+        self.max_cities = max_cities
+        self.batch = batch
+
+
+def build_benchmarks(fixtures) -> List[Benchmark]:
+    from streamlit_weather_app import build_forecast_figure, build_forecast_view
+    from weather_columns import ForecastColumns, aggregate_daily
+
+    api = WeatherAPI(api_key='benchmark', use_city_index=False, calls_per_minute=0, calls_per_day=0)
+
+    def formatted(i):
+        return api.format_forecast_data(fixtures.forecast(i))
+
+    def columnar(i):
+        return api.format_forecast_data(fixtures.forecast(i), columnar=True)
+
+    def first_day(i):
+        entries = formatted(i)
+        day = entries[0]['datetime'].date()
+        return [entry for entry in entries if entry['datetime'].date() == day]
+
+    def all_columns(n):
+        return ForecastColumns.concat([columnar(i) for i in range(n)])
+
+    return [
+        Benchmark('format_weather_data', fixtures.weather, api.format_weather_data),
+        Benchmark('format_forecast_data', fixtures.forecast, api.format_forecast_data),
+        Benchmark('format_forecast_data[columnar]', fixtures.forecast,
+                  lambda data: api.format_forecast_data(data, columnar=True)),
+        Benchmark('get_daily_forecast', formatted, api.get_daily_forecast),
+        Benchmark('get_daily_forecast[columnar]', columnar, api.get_daily_forecast),
+        Benchmark('_process_daily_data', first_day, api._process_daily_data),
+        Benchmark('aggregate_daily[batch]', all_columns, lambda columns: aggregate_daily(columns, days=5), batch=True),
+        Benchmark('streamlit.build_forecast_view', fixtures.forecast, build_forecast_view, max_cities=1000),
+        Benchmark('streamlit.build_forecast_figure', lambda i: build_forecast_view(fixtures.forecast(i))['frame'],
+                  lambda frame: build_forecast_figure(frame, '°C'), max_cities=100),
+    ]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_benchmark(bench: Benchmark, cities: int, repeat: int = 3, memory_samples: int = 50) -> Dict:
+    """
+    Time a benchmark for a number of cities
+
+    Args:
+        bench: Benchmark to run
+        cities: Number of cities
+        repeat: Timed calls per input; the fastest counts, as with timeit
+        memory_samples: Calls traced with tracemalloc (tracing is slow)
+
+    Returns:
+        Dictionary with cities, throughput (cities/s), p50/p95/p99 call
+        latency in microseconds and peak traced memory per call in KB
+    """
+    peak = 0
+
+    # Warm up once so lazy imports and first-call caches aren't timed
+    bench.run(bench.prepare(1 if bench.batch else 0))
+
+    # Like timeit, keep garbage collection pauses out of the timings
+    gc.collect()
+    gc.disable()
+    try:
+        latencies, total = _time_calls(bench, cities, repeat)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    if bench.batch:
+        bench.run(bench.prepare(cities))
+        peak = tracemalloc.get_traced_memory()[1]
+    else:
+        for i in range(min(cities, memory_samples)):
+            data = bench.prepare(i)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            bench.run(data)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'cities': cities,
+        'throughput': cities / total if total else float('inf'),
+        'p50_us': percentile(latencies, 0.50) * 1e6,
+        'p95_us': percentile(latencies, 0.95) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+        'peak_kb': peak / 1024
+    }
+
+
+def _time_calls(bench: Benchmark, cities: int, repeat: int):
+    def best_of(data):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            bench.run(data)
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    if bench.batch:
+        latency = best_of(bench.prepare(cities))
+        return [latency], latency
+
+    latencies = [best_of(bench.prepare(i)) for i in range(cities)]
+    return latencies, sum(latencies)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            tolerance: float, memory_tolerance: float) -> List[str]:
+    """
+    Find regressions against a baseline
+
+    Timings on shared machines drift by tens of percent between runs, so a
+    benchmark's throughput regresses only when the median ratio to the
+    baseline across its city counts falls below 1 - tolerance. Peak memory
+    is deterministic and is checked per city count.
+
+    Args:
+        results: Current results keyed by "name@cities"
+        baseline: Stored results with the same keys
+        tolerance: Allowed relative throughput loss
+        memory_tolerance: Allowed relative peak memory growth
+
+    Returns:
+        List of regression messages
+    """
+    regressions = []
+    ratios: Dict[str, List[float]] = {}
+
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+
+        ratios.setdefault(key.rsplit('@', 1)[0], []).append(current['throughput'] / previous['throughput'])
+
+        # Ignore a few KB of allocator noise on tiny inputs
+        if current['peak_kb'] > previous['peak_kb'] * (1 + memory_tolerance) + 16:
+            regressions.append(f"{key}: peak memory {current['peak_kb']:,.1f} KB "
+                               f"vs baseline {previous['peak_kb']:,.1f} KB")
+
+    for name, values in ratios.items():
+        ratio = sorted(values)[len(values) // 2]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{name}: throughput at {ratio:.0%} of baseline (median over city counts)")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path benchmarks with a stored baseline")
+    parser.add_argument('--cities', default=','.join(map(str, DEFAULT_CITIES)),
+                        help="comma-separated city counts")
+    parser.add_argument('--repeat', type=int, default=3, help="timed calls per input, fastest counts")
+    parser.add_argument('--runs', type=int, default=1,
+                        help="repeat the whole suite and report per-metric medians (use 3+ for a baseline)")
+    parser.add_argument('--only', default='', help="run benchmarks whose name contains this text")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="allowed relative throughput loss before failing (default 0.5)")
+    parser.add_argument('--memory-tolerance', type=float, default=0.1,
+                        help="allowed relative peak memory growth before failing (default 0.1)")
+    parser.add_argument('--synthetic', type=int, metavar='SEED',
+                        help="use generated payloads with this seed instead of the fixtures (no baseline check)")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+    if args.synthetic is not None and args.save_baseline:
+        parser.error("the baseline is recorded on the fixtures, drop --synthetic")
+
+    city_counts = [int(value) for value in args.cities.split(',')]
+    if args.synthetic is not None:
+        inputs = SyntheticCities(max(city_counts), seed=args.synthetic)
+    else:
+        inputs = FixtureCities()
+    benchmarks = [bench for bench in build_benchmarks(inputs) if args.only in bench.name]
+
+    print(f"{'benchmark':<34}{'cities':>7}{'cities/s':>13}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}{'peak KB':>10}")
+    runs = []
+    for _ in range(args.runs):
+        results = {}
+        for bench in benchmarks:
+            for cities in city_counts:
+                if not bench.max_cities or cities <= bench.max_cities:
+                    results[f"{bench.name}@{cities}"] = run_benchmark(bench, cities, args.repeat)
+        runs.append(results)
+
+    results = {key: {metric: statistics.median(run[key][metric] for run in runs) for metric in runs[0][key]}
+               for key in runs[0]}
+    for key, result in results.items():
+        name, cities = key.rsplit('@', 1)
+        print(f"{name:<34}{cities:>7}{result['throughput']:>13,.0f}{result['p50_us']:>10,.1f}"
+              f"{result['p95_us']:>10,.1f}{result['p99_us']:>10,.1f}{result['peak_kb']:>10,.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'machine': platform.platform(), 'python': platform.python_version(),
+                       'results': results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if args.synthetic is not None:
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline stored yet; run with --save-baseline")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('machine') != platform.platform():
+        print(f"Note: baseline was recorded on {baseline.get('machine')}")
+
+    regressions = compare(results, baseline['results'], args.tolerance, args.memory_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
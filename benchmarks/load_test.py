@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Concurrent-session load test for the Streamlit app
+
+Starts the local OpenWeatherMap stand-in and a headless `streamlit run`
+of StreamlitWeatherApp, then drives N simulated browser sessions over
+Streamlit's websocket protocol. Each session searches for cities, toggles
+the temperature units and flips the forecast/chart checkboxes; widgets
+inside fragments rerun only their fragment, as in a browser. Every level
+runs on a fresh app process and reports per-rerun latency percentiles,
+upstream API calls, and the app process's CPU time and memory.
+
+Needs the websockets package (benchmark only, not used by the app):
+    pip install websockets
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --sessions 1,10,50 --actions 30 --latency 0.2
+    python benchmarks/load_test.py --sessions 5,20,80 --p95-budget 1500 --json load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from weather_gazetteer import load_default_index  # noqa: E402
+from weather_mock_server import MockOpenWeatherServer  # noqa: E402
+
+
+DEFAULT_SESSIONS = (1, 5, 10, 25)
+DEFAULT_MIX = {'search': 0.4, 'units': 0.3, 'checkbox': 0.3}
+
+# Entry script for `streamlit run`: the app with an API key, so it takes
+# the live path against the stand-in instead of showing sample data
+APP_SCRIPT = """
+import os, sys
+sys.path.insert(0, {root!r})
+import streamlit_weather_app as module
+app = module.StreamlitWeatherApp()
+app.api_key = os.environ['LOAD_TEST_API_KEY']
+app.run()
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class AppProcess:
+    """A headless `streamlit run` of the app, with CPU and memory readings"""
+
+    def __init__(self, api_root: str, workdir: str):
+        """
+        Args:
+            api_root: OpenWeatherMap root the app talks to
+            workdir: Directory for the entry script and log
+        """
+        self.port = free_port()
+        script = os.path.join(workdir, 'load_test_app.py')
+        with open(script, 'w') as f:
+            f.write(APP_SCRIPT.format(root=ROOT))
+
+        env = dict(os.environ, LOAD_TEST_API_KEY='load-test', OPENWEATHER_API_ROOT=api_root,
+                   OPENWEATHER_CALLS_PER_MINUTE='0', OPENWEATHER_CALLS_PER_DAY='0', PYTHONWARNINGS='ignore')
+        env.pop('WEATHER_CACHE_PATH', None)
+        env.pop('WEATHER_APP_TIMINGS', None)
+
+        self.log = open(os.path.join(workdir, 'streamlit.log'), 'w')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', script,
+             '--server.headless', 'true', '--server.port', str(self.port),
+             '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+            cwd=workdir, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def wait_ready(self, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise Exception(f"Streamlit exited with code {self.process.returncode}, see {self.log.name}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        raise Exception(f"Streamlit did not start within {timeout:.0f} s, see {self.log.name}")
+
+    def cpu_seconds(self) -> Optional[float]:
+        """User plus system CPU time of the app process (Linux only)"""
+        try:
+            with open(f"/proc/{self.process.pid}/stat") as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            return None
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    def rss_mb(self) -> Optional[float]:
+        """Resident memory of the app process in MB (Linux only)"""
+        try:
+            with open(f"/proc/{self.process.pid}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+class Session:
+    """One simulated browser tab speaking Streamlit's websocket protocol"""
+
+    def __init__(self, url: str, timeout: float = 60):
+        self.url = url
+        self.timeout = timeout
+        self.ws = None
+        self.widgets: Dict[str, Dict] = {}
+        self.values: Dict[str, object] = {}
+
+    async def connect(self):
+        import websockets
+
+        self.ws = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def rerun(self, changed: Optional[str] = None, value=None) -> Dict:
+        """
+        Change one widget (or none, for the first load) and wait for the rerun
+
+        Returns:
+            Dictionary with latency (s), fragment (bool) and errors (count)
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        fragment_id = ''
+        if changed is not None:
+            self.values[changed] = value
+            fragment_id = self.widgets[changed]['fragment_id']
+
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        message.rerun_script.page_script_hash = ''
+        message.rerun_script.fragment_id = fragment_id
+        for key, current in self.values.items():
+            widget = self.widgets[key]
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget['id']
+            if widget['type'] == 'checkbox':
+                state.bool_value = current
+            else:
+                state.string_value = current
+
+        started = time.perf_counter()
+        await self.ws.send(message.SerializeToString())
+
+        errors = 0
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(self.ws.recv(), self.timeout))
+            kind = forward.WhichOneof('type')
+
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type in ('exception', 'alert') and (
+                        element_type == 'exception' or element.alert.format == element.alert.ERROR):
+                    errors += 1
+                elif element_type in ('text_input', 'radio', 'checkbox'):
+                    widget = getattr(element, element_type)
+                    # Keyed widget ids end in their key, unkeyed ones in "None"
+                    key = widget.id.rsplit('-', 1)[-1]
+                    if key == 'None' or not widget.id.startswith('$$ID'):
+                        key = widget.label
+                    self.widgets[key] = {'id': widget.id, 'type': element_type,
+                                         'fragment_id': forward.delta.fragment_id}
+
+            elif kind == 'script_finished':
+                if forward.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    errors += 1
+                return {'latency': time.perf_counter() - started, 'fragment': bool(fragment_id), 'errors': errors}
+
+
+async def run_session(url: str, actions: int, think: float, mix: Dict[str, float],
+                      cities: List[str], rng: random.Random, samples: Dict[str, List[float]],
+                      counters: Dict[str, int]):
+    session = Session(url)
+    await session.connect()
+    try:
+        samples['load'].append((await session.rerun())['latency'])
+
+        kinds, weights = zip(*mix.items())
+        for _ in range(actions):
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+            kind = rng.choices(kinds, weights)[0]
+
+            if kind == 'search':
+                result = await session.rerun('Enter city name:', rng.choice(cities))
+            elif kind == 'units':
+                current = session.values.get('units', 'Celsius')
+                result = await session.rerun('units', 'Fahrenheit' if current == 'Celsius' else 'Celsius')
+            else:
+                key = rng.choice([key for key in ('show_forecast', 'show_charts') if key in session.widgets])
+                result = await session.rerun(key, not session.values.get(key, True))
+
+            samples[kind].append(result['latency'])
+            counters['errors'] += result['errors']
+            counters['fragment_reruns'] += result['fragment']
+    except (asyncio.TimeoutError, OSError) as e:
+        counters['failed_sessions'] += 1
+        counters['last_failure'] = repr(e)
+    finally:
+        await session.close()
+
+
+def run_level(sessions: int, server: MockOpenWeatherServer, args, cities: List[str]) -> Dict:
+    """
+    Run one load level on a fresh app process
+
+    Returns:
+        Dictionary with latency percentiles (ms) overall and per action,
+        rerun and upstream call counts, CPU time and memory figures
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        app = AppProcess(server.url, workdir)
+        try:
+            app.wait_ready()
+
+            # One throwaway session first, so the lazy imports and first-run
+            # caches of the process aren't counted against the sessions
+            asyncio.run(run_session(app.url, 0, 0, args.mix, cities, random.Random(),
+                                    {'load': []}, dict.fromkeys(('errors', 'fragment_reruns', 'failed_sessions'), 0)))
+            idle_rss, cpu_before = app.rss_mb(), app.cpu_seconds()
+            calls_before = server.stats()['requests']
+
+            samples = {kind: [] for kind in ('load', *args.mix)}
+            counters = {'errors': 0, 'fragment_reruns': 0, 'failed_sessions': 0}
+            rng = random.Random(args.seed + sessions)
+
+            async def drive():
+                await asyncio.gather(*(
+                    run_session(app.url, args.actions, args.think, args.mix, cities,
+                                random.Random(rng.random()), samples, counters)
+                    for _ in range(sessions)))
+
+            started = time.perf_counter()
+            asyncio.run(drive())
+            elapsed = time.perf_counter() - started
+
+            busy_rss, cpu_after = app.rss_mb(), app.cpu_seconds()
+            calls_after = server.stats()['requests']
+        finally:
+            app.stop()
+
+    latencies = sorted(value for values in samples.values() for value in values)
+    calls = {endpoint: count - calls_before.get(endpoint, 0) for endpoint, count in calls_after.items()}
+    cpu = cpu_after - cpu_before if cpu_after is not None and cpu_before is not None else None
+
+    def ms(values, fraction):
+        value = percentile(sorted(values), fraction)
+        return None if value is None else value * 1000
+
+    return {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'reruns_per_s': len(latencies) / elapsed if elapsed else 0,
+        'p50_ms': ms(latencies, 0.50),
+        'p95_ms': ms(latencies, 0.95),
+        'p99_ms': ms(latencies, 0.99),
+        'p95_ms_by_action': {kind: ms(values, 0.95) for kind, values in samples.items()},
+        'fragment_reruns': counters['fragment_reruns'],
+        'errors': counters['errors'],
+        'failed_sessions': counters['failed_sessions'],
+        'upstream_calls': sum(calls.values()),
+        'upstream_calls_by_endpoint': calls,
+        'cpu_s': cpu,
+        'cpu_ms_per_rerun': cpu * 1000 / len(latencies) if cpu is not None and latencies else None,
+        'cpu_ms_per_session': cpu * 1000 / sessions if cpu is not None else None,
+        'cpu_utilization': cpu / elapsed if cpu is not None and elapsed else None,
+        'idle_rss_mb': idle_rss,
+        'rss_mb': busy_rss,
+        'rss_mb_per_session': (busy_rss - idle_rss) / sessions if busy_rss is not None and idle_rss is not None else None,
+        'elapsed_s': elapsed
+    }
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown action {kind!r}, use {', '.join(DEFAULT_MIX)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit app")
+    parser.add_argument('--sessions', default=','.join(map(str, DEFAULT_SESSIONS)),
+                        help="comma-separated concurrent session counts, one level each")
+    parser.add_argument('--actions', type=int, default=20, help="interactions per session after the first load")
+    parser.add_argument('--think', type=float, default=1.0, help="mean seconds between a session's interactions")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help="action weights, e.g. search=0.4,units=0.3,checkbox=0.3")
+    parser.add_argument('--cities', type=int, default=50, help="distinct cities searched (cache hit rate)")
+    parser.add_argument('--latency', type=float, default=0.1, help="stand-in API latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.1, help="extra random stand-in latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of stand-in 500 responses")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of stand-in 429 responses")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--p95-budget', type=float, help="report the largest level whose p95 rerun stays within this many ms")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        sys.exit("load_test.py needs the websockets package (benchmark only): pip install websockets")
+
+    index = load_default_index()
+    by_population = sorted(range(len(index)), key=lambda i: -index.populations[i])
+    cities = [index.names[i] for i in by_population[:args.cities]]
+
+    server = MockOpenWeatherServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                   rate_limit_rate=args.rate_limit_rate, seed=args.seed, synthetic=True)
+    results = []
+    with server:
+        print(f"{'sessions':>8}{'reruns':>8}{'rerun/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+              f"{'upstream':>10}{'CPU ms/rerun':>14}{'CPU %':>7}{'RSS MB':>8}{'MB/session':>12}{'errors':>8}")
+        for sessions in (int(value) for value in args.sessions.split(',')):
+            result = run_level(sessions, server, args, cities)
+            results.append(result)
+
+            def cell(value, width, spec):
+                return f"{'n/a' if value is None else format(value, spec):>{width}}"
+
+            utilization = None if result['cpu_utilization'] is None else result['cpu_utilization'] * 100
+            print(f"{sessions:>8}{result['reruns']:>8}{result['reruns_per_s']:>9.1f}"
+                  f"{cell(result['p50_ms'], 9, '.0f')}{cell(result['p95_ms'], 9, '.0f')}{cell(result['p99_ms'], 9, '.0f')}"
+                  f"{result['upstream_calls']:>10}{cell(result['cpu_ms_per_rerun'], 14, '.1f')}"
+                  f"{cell(utilization, 7, '.0f')}{cell(result['rss_mb'], 8, '.0f')}"
+                  f"{cell(result['rss_mb_per_session'], 12, '.2f')}{result['errors'] + result['failed_sessions']:>8}")
+
+    print()
+    for result in results:
+        by_action = ', '.join(f"{kind} {'n/a' if value is None else f'{value:.0f}'}"
+                              for kind, value in result['p95_ms_by_action'].items())
+        print(f"{result['sessions']} sessions, p95 ms by action: {by_action}; "
+              f"{result['fragment_reruns']} fragment reruns; upstream {result['upstream_calls_by_endpoint']}")
+
+    if args.p95_budget:
+        within = [result['sessions'] for result in results
+                  if result['p95_ms'] is not None and result['p95_ms'] <= args.p95_budget
+                  and not result['failed_sessions']]
+        if within:
+            print(f"Largest level within a p95 of {args.p95_budget:.0f} ms: {max(within)} sessions per process")
+        else:
+            print(f"No level stayed within a p95 of {args.p95_budget:.0f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': {key: value for key, value in vars(args).items() if key != 'json'},
+                       'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-streamlit_weather_app.py
 #!/usr/bin/env python3
 """
 Weather App with Streamlit
@@ -6,23 +5,144 @@ A modern web-based weather application with an interactive interface
 """
 
 import streamlit as st
-import requests
-import json
+import hashlib
 from datetime import datetime
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from PIL import Image
 import os
-from io import BytesIO
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from weather_api import WeatherAPI
+from weather_gazetteer import load_default_index
+
+# numpy, pandas and plotly are imported on first use: the page and the
+# sample-data mode render without paying for them
+
+
+@st.cache_resource
+def weather_client(api_key):
+    """
+    One WeatherAPI per API key, shared by every session of this process
+    
+    Its connection pool, response cache, request coalescing and quota
+    metering apply to all users at once.
+    """
+    return WeatherAPI(api_key=api_key)
+
+
+@st.cache_resource
+def snapshot_executor():
+    """Worker threads shared by every session for the parallel snapshot fetches"""
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="weather-snapshot")
+
+
+def build_forecast_view(forecast_data, units="Celsius"):
+    """
+    Build the typed, unit-converted forecast frame and daily summary once
+    
+    Returns:
+        Dictionary with 'frame' (one row per 3-hour step), 'daily'
+        (aggregate_daily output) and 'temp_unit'
+    """
+    from weather_columns import ForecastColumns, aggregate_daily, local_datetimes
+    
+    columns = ForecastColumns.from_api(forecast_data)
+    
+    # Convert temperature if needed (fresh arrays, safe to update in place)
+    if units == "Fahrenheit":
+        for name in ('temp', 'feels_like', 'temp_min', 'temp_max'):
+            values = getattr(columns, name)
+            values *= 9/5
+            values += 32
+        temp_unit = "°F"
+    else:
+        temp_unit = "°C"
+    
+    frame = columns.to_dataframe()
+    frame['datetime'] = local_datetimes(columns.time)
+    
+    return {
+        'frame': frame,
+        'daily': aggregate_daily(columns, days=5),
+        'temp_unit': temp_unit
+    }
+
+
+@st.cache_data(ttl=WeatherAPI.CACHE_TTLS['forecast'], max_entries=1000, show_spinner=False)
+def load_forecast_view(city, country, api_key, units, _forecast_data=None):
+    """Forecast view for (city, units), built from already fetched data when given"""
+    if _forecast_data is None:
+        _forecast_data = weather_client(api_key).get_forecast(city, country)
+    return build_forecast_view(_forecast_data, units)
+
+
+def forecast_frame_digest(frame):
+    """Content hash of the charted columns of a forecast frame"""
+    import pandas as pd
+    
+    hashed = pd.util.hash_pandas_object(frame[['datetime', 'temp', 'humidity', 'wind_speed']], index=False)
+    return hashlib.blake2b(hashed.to_numpy().tobytes(), digest_size=16).hexdigest()
+
+
+def build_forecast_figure(frame, temp_unit):
+    """
+    Build the combined temperature / humidity / wind figure
+    
+    WebGL traces keep the browser-side redraw cheap.
+    
+    Returns:
+        Tuple of (figure, serialized payload size in bytes)
+    """
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    from plotly.subplots import make_subplots
+    
+    fig = make_subplots(
+        rows=2, cols=2,
+        specs=[[{'colspan': 2}, None], [{}, {}]],
+        subplot_titles=(f'Temperature Forecast ({temp_unit})', 'Humidity Forecast (%)', 'Wind Speed Forecast (m/s)'),
+        row_heights=[0.57, 0.43],
+        vertical_spacing=0.12
+    )
+    
+    x = frame['datetime'].to_numpy()
+    panels = (
+        (1, 1, 'temp', f'Temperature ({temp_unit})'),
+        (2, 1, 'humidity', 'Humidity (%)'),
+        (2, 2, 'wind_speed', 'Wind Speed (m/s)')
+    )
+    for row, col, column, label in panels:
+        fig.add_trace(go.Scattergl(x=x, y=frame[column].to_numpy(), mode='lines', name=label), row=row, col=col)
+        fig.update_yaxes(title_text=label, row=row, col=col)
+    
+    fig.update_xaxes(title_text='Date & Time', row=2)
+    fig.update_layout(height=700, showlegend=False)
+    
+    return fig, len(pio.to_json(fig, validate=False))
+
+
+@st.cache_resource(ttl=WeatherAPI.CACHE_TTLS['forecast'], max_entries=1000, show_spinner=False)
+def load_forecast_figure(digest, temp_unit, _frame):
+    """
+    Build the forecast figure once per frame content and unit
+    
+    Only construction is cached: st.plotly_chart still serializes the
+    figure (about 1 ms) and sends it whenever the charts fragment runs.
+    The returned figure is shared (not copied) between reruns and
+    sessions, so it must not be mutated.
+    """
+    return build_forecast_figure(_frame, temp_unit)
 
 
 class StreamlitWeatherApp:
-    def _init_(self):
+    def __init__(self):
         self.api_key = "YOUR_API_KEY_HERE"  # Replace with your OpenWeatherMap API key
-        self.base_url = "https://api.openweathermap.org/data/2.5/weather"
-        self.forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
-        self.geocoding_url = "https://api.openweathermap.org/geo/1.0/direct"
+        self.city_index = load_default_index()
+    
+    @property
+    def api(self):
+        """Process-wide WeatherAPI client for the configured key"""
+        return weather_client(self.api_key)
         
     def setup_page(self):
         """Configure Streamlit page settings"""
@@ -83,11 +203,33 @@ class StreamlitWeatherApp:
         # Country code (optional)
         country = st.sidebar.text_input("Country code (optional):", placeholder="e.g., GB, US")
         
+        # Autocomplete from the offline city index (no API calls)
+        city, country = self.render_city_suggestions(city, country)
+        
         # Search button
         search_button = st.sidebar.button("🌍 Get Weather", type="primary")
         
         return city, country, search_button
     
+    def render_city_suggestions(self, city, country=""):
+        """Offer matching cities for the typed text and return the chosen one"""
+        text = f"{city},{country}" if country else city
+        suggestions = self.city_index.suggest(text.strip(), limit=8) if len(city.strip()) >= 2 else []
+        
+        exact = [item for item in suggestions
+                 if item['name'].lower() == city.strip().lower()
+                 and (not country or item['country'] == country.strip().upper())]
+        if not suggestions or len(exact) == len(suggestions):
+            return city, country
+        
+        labels = ["(as typed)"] + [f"{item['name']}, {item['country']}" for item in suggestions]
+        choice = st.sidebar.selectbox("Suggestions:", range(len(labels)),
+                                      format_func=lambda i: labels[i])
+        if choice:
+            item = suggestions[choice - 1]
+            return item['name'], item['country']
+        return city, country
+    
     def render_sidebar_info(self):
         """Render additional information in sidebar"""
         st.sidebar.markdown("---")
@@ -100,55 +242,140 @@ class StreamlitWeatherApp:
         - Detailed weather metrics
         """)
         
-        st.sidebar.markdown("---")
-        st.sidebar.header("🔧 Settings")
-        units = st.sidebar.selectbox("Temperature units:", ["Celsius", "Fahrenheit"])
-        show_forecast = st.sidebar.checkbox("Show 5-day forecast", value=True)
-        show_charts = st.sidebar.checkbox("Show weather charts", value=True)
+    
+    def render_display_settings(self):
+        """Render the display settings toolbar (inside the panels fragment)"""
+        return st.radio("Temperature units:", ["Celsius", "Fahrenheit"],
+                        horizontal=True, key="units")
+    
+    def record_timing(self, scope, started):
+        """Record how long a full run or fragment rerun took"""
+        elapsed = (time.perf_counter() - started) * 1000
+        timings = st.session_state.setdefault('timings', {})
+        history = timings.setdefault(scope, deque(maxlen=50))
+        history.append(elapsed)
+        
+        if os.getenv('WEATHER_APP_TIMINGS'):
+            median = sorted(history)[len(history) // 2]
+            st.caption(f"⏱ {scope}: {elapsed:.1f} ms (median {median:.1f} ms over {len(history)} runs)")
+    
+    def record_payload(self, scope, size):
+        """Record the serialized size of a chart sent to the browser"""
+        st.session_state.setdefault('payloads', {})[scope] = size
         
-        return units, show_forecast, show_charts
+        if os.getenv('WEATHER_APP_TIMINGS'):
+            st.caption(f"📦 {scope}: {size / 1024:.1f} KB figure payload")
     
-    def get_weather_data(self, city, country=""):
-        """Fetch current weather data"""
+    def get_forecast_view(self, city, country="", units="Celsius", forecast_data=None):
+        """
+        Get the forecast's shared frame for (city, units), memoized across reruns
+        
+        forecast_data is the snapshot's forecast response; without it the
+        forecast is fetched here.
+        """
         try:
-            # Construct query
-            query = f"{city},{country}" if country else city
-            url = f"{self.base_url}?q={query}&appid={self.api_key}&units=metric"
-            
-            response = requests.get(url, timeout=10)
-            data = response.json()
-            
-            if response.status_code == 200:
-                return data
-            else:
-                st.error(f"Error: {data.get('message', 'Unknown error')}")
-                return None
+            return load_forecast_view(city, country, self.api_key, units, forecast_data)
                 
-        except requests.RequestException as e:
-            st.error(f"Network error: {str(e)}")
-            return None
-        except Exception as e:
-            st.error(f"Unexpected error: {str(e)}")
+        except Exception:
             return None
     
-    def get_forecast_data(self, city, country=""):
-        """Fetch 5-day forecast data"""
+    def start_snapshot(self, city, country=""):
+        """
+        Start the current weather, forecast and air pollution fetches in parallel
+        
+        Coordinates come from the offline city index when it knows the city;
+        otherwise the air pollution fetch waits for the current weather's.
+        
+        Returns:
+            Dictionary mapping panel name to its Future
+        """
+        executor = snapshot_executor()
+        api = self.api
+        
+        current = executor.submit(api.get_current_weather, city, country)
+        forecast = executor.submit(api.get_forecast, city, country)
+        
+        matches = self.city_index.lookup(city, country)
+        if matches:
+            air_pollution = executor.submit(api.get_air_pollution, matches[0]['lat'], matches[0]['lon'])
+        else:
+            air_pollution = executor.submit(self.load_air_pollution_for, api, current)
+        
+        return {'current': current, 'air_pollution': air_pollution, 'forecast': forecast}
+    
+    def load_air_pollution_for(self, api, weather_future):
+        """Fetch air pollution at the coordinates of a pending current-weather fetch"""
+        coord = weather_future.result()['coord']
+        return api.get_air_pollution(coord['lat'], coord['lon'])
+    
+    def snapshot_result(self, future):
+        """Result of a snapshot fetch, or None after showing its error"""
         try:
-            query = f"{city},{country}" if country else city
-            url = f"{self.forecast_url}?q={query}&appid={self.api_key}&units=metric"
-            
-            response = requests.get(url, timeout=10)
-            data = response.json()
-            
-            if response.status_code == 200:
-                return data
-            else:
-                return None
+            return future.result()
                 
         except Exception as e:
-            st.error(f"Error fetching forecast: {str(e)}")
+            st.error(str(e))
             return None
     
+    @st.fragment
+    def render_weather_panels(self, snapshot, city, country=""):
+        """
+        Render the weather panels as a fragment, streaming each one in as its data arrives
+        
+        Changing the units reruns only this fragment, not the page setup,
+        header, sidebar or snapshot fetches.
+        """
+        started = time.perf_counter()
+        
+        units = self.render_display_settings()
+        
+        # Reserve each panel's place on the page, then fill it as its fetch completes
+        slots = {name: st.container() for name in ('current', 'air_pollution', 'forecast')}
+        pending = {future: name for name, future in snapshot.items()}
+        
+        for painted, future in enumerate(as_completed(pending)):
+            name = pending[future]
+            
+            with slots[name]:
+                if name == 'current':
+                    weather_data = self.snapshot_result(future)
+                    if weather_data:
+                        self.render_current_weather(weather_data, units)
+                    else:
+                        st.error("❌ Could not fetch weather data. Please check your input and try again.")
+                elif name == 'air_pollution':
+                    if not future.exception():
+                        self.render_air_quality(future.result())
+                else:
+                    forecast_data = None if future.exception() else future.result()
+                    self.render_forecast_panel(city, country, units, forecast_data)
+                    self.render_charts_panel(city, country, units, forecast_data)
+            
+            if not painted:
+                self.record_timing('first paint', started)
+        
+        self.record_timing('panels', started)
+    
+    @st.fragment
+    def render_forecast_panel(self, city, country, units, forecast_data=None):
+        """Forecast cards; toggling them reruns only this fragment"""
+        started = time.perf_counter()
+        
+        if st.checkbox("Show 5-day forecast", value=True, key="show_forecast"):
+            self.render_forecast(self.get_forecast_view(city, country, units, forecast_data))
+        
+        self.record_timing('forecast', started)
+    
+    @st.fragment
+    def render_charts_panel(self, city, country, units, forecast_data=None):
+        """Charts; toggling them reruns only this fragment"""
+        started = time.perf_counter()
+        
+        if st.checkbox("Show weather charts", value=True, key="show_charts"):
+            self.render_charts(self.get_forecast_view(city, country, units, forecast_data))
+        
+        self.record_timing('charts', started)
+    
     def render_current_weather(self, data, units="Celsius"):
         """Render current weather information"""
         if not data:
@@ -240,109 +467,69 @@ class StreamlitWeatherApp:
                 value=sunset
             )
     
-    def render_forecast(self, forecast_data, units="Celsius"):
+    def render_air_quality(self, data):
+        """Render the air quality index and main pollutants"""
+        if not data or not data.get('list'):
+            return
+        
+        st.subheader("🌫 Air Quality")
+        
+        entry = data['list'][0]
+        aqi = entry['main']['aqi']
+        components = entry.get('components', {})
+        labels = {1: "Good", 2: "Fair", 3: "Moderate", 4: "Poor", 5: "Very Poor"}
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric(label="🏷 AQI", value=f"{aqi} · {labels.get(aqi, 'Unknown')}")
+        
+        for col, (key, label) in zip((col2, col3, col4, col5),
+                                     (('pm2_5', "PM2.5"), ('pm10', "PM10"), ('o3', "O₃"), ('no2', "NO₂"))):
+            with col:
+                st.metric(label=label, value=f"{components.get(key, 0):.1f} μg/m³")
+    
+    def render_forecast(self, forecast_view):
         """Render 5-day weather forecast"""
-        if not forecast_data:
+        if not forecast_view:
             return
             
         st.subheader("📅 5-Day Forecast")
         
-        # Process forecast data
-        forecast_list = []
-        for item in forecast_data['list'][:40]:  # Next 5 days (8 forecasts per day)
-            forecast_list.append({
-                'datetime': datetime.fromtimestamp(item['dt']),
-                'temp': item['main']['temp'],
-                'feels_like': item['main']['feels_like'],
-                'humidity': item['main']['humidity'],
-                'pressure': item['main']['pressure'],
-                'description': item['weather'][0]['description'],
-                'wind_speed': item['wind']['speed'],
-                'icon': item['weather'][0]['icon']
-            })
-        
-        df = pd.DataFrame(forecast_list)
-        
-        # Convert temperature if needed
-        if units == "Fahrenheit":
-            df['temp'] = (df['temp'] * 9/5) + 32
-            df['feels_like'] = (df['feels_like'] * 9/5) + 32
-            temp_unit = "°F"
-        else:
-            temp_unit = "°C"
-        
-        # Display daily forecast cards
-        daily_forecasts = df.groupby(df['datetime'].dt.date).agg({
-            'temp': ['min', 'max', 'mean'],
-            'humidity': 'mean',
-            'pressure': 'mean',
-            'description': 'first',
-            'wind_speed': 'mean'
-        }).head(5)
+        daily = forecast_view['daily']
+        temp_min, temp_max = daily['temp_min'], daily['temp_max']
+        temp_unit = forecast_view['temp_unit']
         
         cols = st.columns(5)
         
-        for i, (date, row) in enumerate(daily_forecasts.iterrows()):
+        for i, date in enumerate(daily['date'].tolist()):
+            description = daily['conditions'][daily['condition'][i]][1]
             with cols[i]:
                 st.markdown(f"""
                 <div class="forecast-card">
                     <h4>{date.strftime('%a, %b %d')}</h4>
-                    <p><strong>{row[('temp', 'max')]:.1f}{temp_unit}</strong></p>
-                    <p style="color: #666;">{row[('temp', 'min')]:.1f}{temp_unit}</p>
-                    <p style="font-size: 0.9rem;">{row[('description', 'first')].title()}</p>
+                    <p><strong>{temp_max[i]:.1f}{temp_unit}</strong></p>
+                    <p style="color: #666;">{temp_min[i]:.1f}{temp_unit}</p>
+                    <p style="font-size: 0.9rem;">{description}</p>
                 </div>
                 """, unsafe_allow_html=True)
     
-    def render_charts(self, forecast_data, units="Celsius"):
+    def render_charts(self, forecast_view):
         """Render weather charts"""
-        if not forecast_data:
+        if not forecast_view:
             return
             
         st.subheader("📈 Weather Charts")
         
-        # Process data for charts
-        chart_data = []
-        for item in forecast_data['list'][:40]:
-            chart_data.append({
-                'datetime': datetime.fromtimestamp(item['dt']),
-                'temperature': item['main']['temp'],
-                'humidity': item['main']['humidity'],
-                'pressure': item['main']['pressure'],
-                'wind_speed': item['wind']['speed']
-            })
+        df = forecast_view['frame']
+        temp_unit = forecast_view['temp_unit']
         
-        df = pd.DataFrame(chart_data)
+        # One subplot figure, built only when the forecast or unit changes;
+        # it is still serialized and sent on every run of this fragment
+        fig, payload = load_forecast_figure(forecast_frame_digest(df), temp_unit, df)
+        st.plotly_chart(fig, use_container_width=True)
         
-        # Convert temperature if needed
-        if units == "Fahrenheit":
-            df['temperature'] = (df['temperature'] * 9/5) + 32
-            temp_unit = "°F"
-        else:
-            temp_unit = "°C"
-        
-        # Temperature chart
-        fig_temp = px.line(df, x='datetime', y='temperature', 
-                          title=f'Temperature Forecast ({temp_unit})',
-                          labels={'temperature': f'Temperature ({temp_unit})', 'datetime': 'Date & Time'})
-        fig_temp.update_layout(height=400)
-        st.plotly_chart(fig_temp, use_container_width=True)
-        
-        # Combined metrics chart
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_humidity = px.line(df, x='datetime', y='humidity', 
-                                  title='Humidity Forecast (%)',
-                                  labels={'humidity': 'Humidity (%)', 'datetime': 'Date & Time'})
-            fig_humidity.update_layout(height=300)
-            st.plotly_chart(fig_humidity, use_container_width=True)
-        
-        with col2:
-            fig_wind = px.line(df, x='datetime', y='wind_speed', 
-                              title='Wind Speed Forecast (m/s)',
-                              labels={'wind_speed': 'Wind Speed (m/s)', 'datetime': 'Date & Time'})
-            fig_wind.update_layout(height=300)
-            st.plotly_chart(fig_wind, use_container_width=True)
+        self.record_payload('charts', payload)
     
     def render_sample_data(self):
         """Render sample data when API key is not configured"""
@@ -397,39 +584,30 @@ class StreamlitWeatherApp:
     
     def run(self):
         """Main function to run the Streamlit app"""
+        started = time.perf_counter()
+        
         self.setup_page()
         self.render_header()
         
         # Sidebar
         city, country, search_button = self.render_search_section()
-        units, show_forecast, show_charts = self.render_sidebar_info()
+        self.render_sidebar_info()
+        
+        # Normalize so "London" and " london" share one cache entry
+        city, country = city.strip().title(), country.strip().upper()
         
         # Main content
         if self.api_key == "YOUR_API_KEY_HERE":
             self.render_sample_data()
         else:
             if search_button or city:
-                # Get current weather
-                weather_data = self.get_weather_data(city, country)
-                
-                if weather_data:
-                    self.render_current_weather(weather_data, units)
-                    
-                    # Get forecast if requested
-                    if show_forecast:
-                        forecast_data = self.get_forecast_data(city, country)
-                        if forecast_data:
-                            self.render_forecast(forecast_data, units)
-                    
-                    # Show charts if requested
-                    if show_charts and show_forecast:
-                        forecast_data = self.get_forecast_data(city, country)
-                        if forecast_data:
-                            self.render_charts(forecast_data, units)
-                else:
-                    st.error("❌ Could not fetch weather data. Please check your input and try again.")
+                # Current weather, forecast and air pollution load in parallel
+                snapshot = self.start_snapshot(city, country)
+                self.render_weather_panels(snapshot, city, country)
             else:
                 st.info("👆 Enter a city name in the sidebar and click 'Get Weather' to start!")
+        
+        self.record_timing('full run', started)
 
 
 def main():
@@ -438,5 +616,5 @@ def main():
     app.run()
 
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     main()
@@ -1,4 +1,3 @@
-weather_api.py
 #!/usr/bin/env python3
 """
 Weather API Module
@@ -8,10 +7,21 @@ Handles all weather API interactions and data processing
 import requests
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import os
+import random
+import threading
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
 
+from weather_gazetteer import CityIndex, load_default_index
+from weather_metrics import ClientMetrics, default_metrics, status_class
+from weather_cache import ResponseCache, SQLiteResponseCache, TieredCache, SingleFlight, FRESH, STALE
+from weather_ratelimit import RateLimiter, BACKGROUND, RATE_LIMITED_MESSAGE, priority, request_priority
+from weather_transport import WeatherTransport
+
 # Load environment variables
 load_dotenv()
 
@@ -19,13 +29,319 @@ load_dotenv()
 class WeatherAPI:
     """Weather API handler class"""
     
-    def _init_(self, api_key: Optional[str] = None):
+    # Seconds a response stays fresh, per endpoint
+    CACHE_TTLS = {
+        'weather': 10 * 60,          # current conditions refresh about every 10 minutes
+        'forecast': 3 * 60 * 60,     # forecast steps are 3 hours apart
+        'air_pollution': 60 * 60,
+        'geocode': 365 * 24 * 60 * 60  # coordinates don't change, keep them essentially forever
+    }
+    
+    def __init__(self, api_key: Optional[str] = None, pool_size: int = 10,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 transport: Optional[WeatherTransport] = None,
+                 cache: Optional[ResponseCache] = None,
+                 cache_ttls: Optional[Dict[str, float]] = None,
+                 stale_while_revalidate: bool = True,
+                 cache_path: Optional[str] = None,
+                 city_index: Optional[CityIndex] = None,
+                 use_city_index: bool = True,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 calls_per_minute: Optional[int] = None,
+                 calls_per_day: Optional[int] = None,
+                 api_root: Optional[str] = None,
+                 metrics: Optional[ClientMetrics] = None,
+                 interactive_wait: float = 15.0):
         self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY', 'YOUR_API_KEY_HERE')
-        self.base_url = "https://api.openweathermap.org/data/2.5"
-        self.geocoding_url = "https://api.openweathermap.org/geo/1.0"
+        
+        # Point api_root (or OPENWEATHER_API_ROOT) at a stand-in such as
+        # weather_mock_server to run offline
+        api_root = (api_root or os.getenv('OPENWEATHER_API_ROOT') or "https://api.openweathermap.org").rstrip('/')
+        self.base_url = f"{api_root}/data/2.5"
+        self.geocoding_url = f"{api_root}/geo/1.0"
         self.icon_url = "https://openweathermap.org/img/wn"
         
-    def get_current_weather(self, city: str, country: str = "", units: str = "metric") -> Optional[Dict]:
+        # One pooled keep-alive transport shared by every endpoint method.
+        # Retryable statuses are retried in _request_json instead, so every
+        # attempt waits for the rate limiter like AsyncWeatherAPI's do.
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.transport = transport or WeatherTransport(
+            pool_size=pool_size,
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+            status_retries=False
+        )
+        
+        # Response cache; set an endpoint's TTL to 0 to disable caching for it.
+        # With a cache_path the memory cache sits in front of a SQLite file
+        # that other processes on the host read and write too.
+        cache_path = cache_path or os.getenv('WEATHER_CACHE_PATH')
+        if cache is not None:
+            self.cache = cache
+        elif cache_path:
+            self.cache = TieredCache(ResponseCache(), SQLiteResponseCache(cache_path))
+        else:
+            self.cache = ResponseCache()
+        self.cache_ttls = dict(self.CACHE_TTLS)
+        if cache_ttls:
+            self.cache_ttls.update(cache_ttls)
+        self.stale_while_revalidate = stale_while_revalidate
+        
+        # Offline gazetteer consulted before the geocoding endpoint
+        if city_index is None and use_city_index:
+            city_index = load_default_index()
+        self.city_index = city_index
+        
+        # Client-side quota metering shared by every endpoint method;
+        # pass calls_per_minute=0 and calls_per_day=0 to disable it
+        if rate_limiter is None:
+            if calls_per_minute is None:
+                calls_per_minute = int(os.getenv('OPENWEATHER_CALLS_PER_MINUTE', 60))
+            if calls_per_day is None:
+                calls_per_day = int(os.getenv('OPENWEATHER_CALLS_PER_DAY', 0))
+            if calls_per_minute or calls_per_day:
+                rate_limiter = RateLimiter(per_minute=calls_per_minute, per_day=calls_per_day)
+        self.rate_limiter = rate_limiter
+        
+        # Seconds an interactive call waits for the limiter before failing
+        # like a 429; background calls wait as long as the budget needs
+        self.interactive_wait = interactive_wait
+        
+        # Per-endpoint latency, error and cache metrics; None (the default
+        # unless WEATHER_METRICS_PORT or WEATHER_METRICS_FILE is set) skips them
+        self.metrics = metrics if metrics is not None else default_metrics()
+        
+        # Concurrent identical requests share one upstream call
+        self.single_flight = SingleFlight()
+        
+        self._refresh_lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_executor = None
+    
+    def connection_stats(self) -> Dict[str, Dict]:
+        """
+        Get per-host connection reuse statistics for the shared transport
+        
+        Returns:
+            Dictionary keyed by host with call, connection and reuse counts
+        """
+        return self.transport.connection_stats()
+    
+    def suggest_cities(self, text: str, limit: int = 8) -> List[Dict]:
+        """
+        Autocomplete a partially typed city name from the offline index
+        
+        Args:
+            text: Typed text, optionally followed by ",<country code>"
+            limit: Maximum number of suggestions
+            
+        Returns:
+            List of location dictionaries (empty without a city index)
+        """
+        if self.city_index is None:
+            return []
+        return self.city_index.suggest(text, limit=limit)
+    
+    def cache_stats(self) -> Dict:
+        """
+        Get response cache hit/miss counters
+        
+        Returns:
+            Dictionary of cache counters (per tier when a disk cache is used)
+        """
+        return self.cache.stats()
+    
+    def coalescing_stats(self) -> Dict[str, int]:
+        """
+        Get single-flight request coalescing counters
+        
+        Returns:
+            Dictionary with upstream calls made and callers that shared one
+        """
+        return self.single_flight.stats()
+    
+    def rate_limit_stats(self) -> Dict:
+        """
+        Get remaining call budget, queue depth and wait-time metrics
+        
+        Returns:
+            Dictionary of rate limiter metrics (empty when metering is disabled)
+        """
+        if self.rate_limiter is None:
+            return {}
+        return self.rate_limiter.stats()
+    
+    def close(self):
+        """Close pooled connections held by the transport"""
+        if self._refresh_executor is not None:
+            self._refresh_executor.shutdown(wait=False)
+        self.transport.close()
+    
+    def _cache_key(self, endpoint: str, params: Dict) -> tuple:
+        """Build a cache key from the endpoint and its query parameters"""
+        items = []
+        for key, value in sorted(params.items()):
+            if key == 'appid':
+                continue
+            if key == 'q':
+                value = value.strip().lower()
+            items.append((key, value))
+        return (endpoint, tuple(items))
+    
+    def _request_json(self, endpoint: str, url: str, params: Dict, error_prefix: str) -> tuple:
+        """
+        Perform a request over the shared transport
+        
+        Every attempt, retries of 429 and 5xx responses included, waits for
+        the rate limiter at the current context's priority.
+        
+        Returns:
+            Tuple of (parsed JSON, response size in bytes)
+        """
+        metrics = self.metrics
+        retry_statuses = () if self.transport.status_retries else WeatherTransport.RETRY_STATUSES
+        level = request_priority.get()
+        wait_limit = self.interactive_wait if level < BACKGROUND else None
+        started = time.perf_counter()
+        attempt = 0
+        retries = 0
+        size = 0
+        
+        while True:
+            if self.rate_limiter is not None:
+                waited = time.perf_counter()
+                try:
+                    self.rate_limiter.acquire(level, timeout=wait_limit)
+                except Exception:
+                    if metrics is not None and attempt:
+                        metrics.record_request(endpoint, time.perf_counter() - started, size, 'rate_limited', retries)
+                    raise Exception(f"{error_prefix}: {RATE_LIMITED_MESSAGE}")
+                finally:
+                    if metrics is not None:
+                        metrics.record_wait(endpoint, time.perf_counter() - waited)
+            
+            try:
+                response = self.transport.get(url, params=params, timeout=10)
+            except requests.RequestException as e:
+                if metrics is not None:
+                    error = 'timeout' if isinstance(e, requests.Timeout) else 'connection'
+                    metrics.record_request(endpoint, time.perf_counter() - started, size, error, retries)
+                raise
+            retries += _retries(response)
+            size += len(response.content)
+            
+            if response.status_code not in retry_statuses or attempt >= self.max_retries:
+                break
+            
+            delay = self.backoff_factor * (2 ** attempt) * (0.5 + random.random())
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            attempt += 1
+            retries += 1
+            time.sleep(delay)
+        
+        error = None
+        try:
+            if response.status_code == 200:
+                return response.json(), len(response.content)
+            else:
+                error = status_class(response.status_code)
+                if response.status_code == 429:
+                    raise Exception(f"{error_prefix}: {RATE_LIMITED_MESSAGE}")
+                error_data = response.json()
+                raise Exception(f"{error_prefix}: {error_data.get('message', 'Unknown error')}")
+        except ValueError:
+            error = error or 'invalid_response'
+            raise
+        finally:
+            if metrics is not None:
+                metrics.record_request(endpoint, time.perf_counter() - started, size, error, retries)
+    
+    def _get_json(self, endpoint: str, url: str, params: Dict, error_prefix: str = "API Error",
+                  fresh: bool = False):
+        """
+        Fetch an endpoint through the response cache
+        
+        Fresh entries are returned directly. Stale entries are returned
+        immediately while a background refresh replaces them. Concurrent
+        misses for the same key share a single upstream call.
+        
+        Args:
+            endpoint: Endpoint name used for the TTL lookup
+            url: Request URL
+            params: Query parameters
+            error_prefix: Prefix for API error messages
+            fresh: Skip the cached entry and fetch from upstream, still
+                   storing the result for later callers
+            
+        Returns:
+            Parsed JSON response (shared with the cache, do not mutate)
+        """
+        ttl = self.cache_ttls.get(endpoint, 0)
+        key = self._cache_key(endpoint, params)
+        if ttl <= 0:
+            if self.metrics is not None:
+                self.metrics.record_cache(endpoint, 'bypass')
+            return self.single_flight.do(key, self._request_json, endpoint, url, params, error_prefix)[0]
+        
+        if fresh:
+            if self.metrics is not None:
+                self.metrics.record_cache(endpoint, 'refresh')
+            return self.single_flight.do(key, self._fetch_and_store, key, ttl, url, params, error_prefix)
+        
+        data, state = self.cache.get(key)
+        
+        if state == FRESH:
+            if self.metrics is not None:
+                self.metrics.record_cache(endpoint, 'hit')
+            return data
+        if state == STALE and self.stale_while_revalidate:
+            if self.metrics is not None:
+                self.metrics.record_cache(endpoint, 'stale')
+            self._schedule_refresh(key, ttl, url, params, error_prefix)
+            return data
+        
+        if self.metrics is not None:
+            self.metrics.record_cache(endpoint, 'miss')
+        return self.single_flight.do(key, self._fetch_and_store, key, ttl, url, params, error_prefix)
+    
+    def _fetch_and_store(self, key: tuple, ttl: float, url: str, params: Dict, error_prefix: str):
+        """Fetch from upstream and cache the response"""
+        data, size = self._request_json(key[0], url, params, error_prefix)
+        self._store(key, data, ttl, size)
+        return data
+    
+    def _store(self, key: tuple, data, ttl: float, size: int):
+        """Store a response, keeping it servable stale for one more TTL"""
+        stale_ttl = ttl if self.stale_while_revalidate else 0
+        self.cache.set(key, data, ttl, stale_ttl=stale_ttl, size=size)
+    
+    def _schedule_refresh(self, key: tuple, ttl: float, url: str, params: Dict, error_prefix: str):
+        """Refresh a stale entry in the background, once per key"""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weather-refresh")
+        
+        def refresh():
+            try:
+                with priority(BACKGROUND):
+                    self.single_flight.do(key, self._fetch_and_store, key, ttl, url, params, error_prefix)
+            except Exception:
+                # Keep serving the stale entry until its window runs out
+                pass
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        self._refresh_executor.submit(refresh)
+        
+    def get_current_weather(self, city: str, country: str = "", units: str = "metric",
+                           fresh: bool = False) -> Optional[Dict]:
         """
         Get current weather for a city
         
@@ -33,6 +349,7 @@ class WeatherAPI:
             city: City name
             country: Country code (optional)
             units: Temperature units (metric, imperial, kelvin)
+            fresh: Fetch from upstream even when a cached response is fresh
             
         Returns:
             Weather data dictionary or None if error
@@ -47,20 +364,15 @@ class WeatherAPI:
                 'units': units
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                error_data = response.json()
-                raise Exception(f"API Error: {error_data.get('message', 'Unknown error')}")
+            return self._get_json('weather', url, params, fresh=fresh)
                 
         except requests.RequestException as e:
             raise Exception(f"Network error: {str(e)}")
         except Exception as e:
             raise Exception(f"Error fetching weather: {str(e)}")
     
-    def get_forecast(self, city: str, country: str = "", units: str = "metric") -> Optional[Dict]:
+    def get_forecast(self, city: str, country: str = "", units: str = "metric",
+                    fresh: bool = False) -> Optional[Dict]:
         """
         Get 5-day weather forecast
         
@@ -68,6 +380,7 @@ class WeatherAPI:
             city: City name
             country: Country code (optional)
             units: Temperature units (metric, imperial, kelvin)
+            fresh: Fetch from upstream even when a cached response is fresh
             
         Returns:
             Forecast data dictionary or None if error
@@ -82,13 +395,36 @@ class WeatherAPI:
                 'units': units
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            return self._get_json('forecast', url, params, fresh=fresh)
+                
+        except requests.RequestException as e:
+            raise Exception(f"Network error: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error fetching forecast: {str(e)}")
+    
+    def get_forecast_by_coordinates(self, lat: float, lon: float, units: str = "metric") -> Optional[Dict]:
+        """
+        Get 5-day weather forecast by coordinates
+        
+        Args:
+            lat: Latitude
+            lon: Longitude
+            units: Temperature units
             
-            if response.status_code == 200:
-                return response.json()
-            else:
-                error_data = response.json()
-                raise Exception(f"API Error: {error_data.get('message', 'Unknown error')}")
+        Returns:
+            Forecast data dictionary or None if error
+        """
+        try:
+            url = f"{self.base_url}/forecast"
+            
+            params = {
+                'lat': lat,
+                'lon': lon,
+                'appid': self.api_key,
+                'units': units
+            }
+            
+            return self._get_json('forecast', url, params)
                 
         except requests.RequestException as e:
             raise Exception(f"Network error: {str(e)}")
@@ -117,13 +453,7 @@ class WeatherAPI:
                 'units': units
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                error_data = response.json()
-                raise Exception(f"API Error: {error_data.get('message', 'Unknown error')}")
+            return self._get_json('weather', url, params)
                 
         except requests.RequestException as e:
             raise Exception(f"Network error: {str(e)}")
@@ -134,6 +464,9 @@ class WeatherAPI:
         """
         Get coordinates for a city
         
+        The offline city index is checked first; the geocoding endpoint is
+        only called for places it doesn't know.
+        
         Args:
             city: City name
             country: Country code (optional)
@@ -142,6 +475,11 @@ class WeatherAPI:
         Returns:
             List of location dictionaries
         """
+        if self.city_index is not None:
+            matches = self.city_index.lookup(city, country, limit)
+            if matches:
+                return matches
+        
         try:
             query = f"{city},{country}" if country else city
             url = f"{self.geocoding_url}/direct"
@@ -152,13 +490,7 @@ class WeatherAPI:
                 'appid': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                error_data = response.json()
-                raise Exception(f"Geocoding error: {error_data.get('message', 'Unknown error')}")
+            return self._get_json('geocode', url, params, error_prefix="Geocoding error")
                 
         except requests.RequestException as e:
             raise Exception(f"Network error: {str(e)}")
@@ -185,19 +517,93 @@ class WeatherAPI:
                 'appid': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                error_data = response.json()
-                raise Exception(f"API Error: {error_data.get('message', 'Unknown error')}")
+            return self._get_json('air_pollution', url, params)
                 
         except requests.RequestException as e:
             raise Exception(f"Network error: {str(e)}")
         except Exception as e:
             raise Exception(f"Error fetching air pollution: {str(e)}")
     
+    def get_current_weather_many(self, locations: Iterable, units: str = "metric",
+                                 max_workers: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Get current weather for many locations concurrently
+        
+        Args:
+            locations: Cities ("London", "London,GB", ("London", "GB")),
+                       coordinates ((51.5, -0.12)) or geocoding result dicts
+            units: Temperature units
+            max_workers: Maximum requests in flight (defaults to the pool size)
+            
+        Yields:
+            Dictionaries with 'location', 'data' and 'error' in completion order
+        """
+        def fetch(location):
+            kind, first, second = split_location(location)
+            if kind == 'coords':
+                return self.get_weather_by_coordinates(first, second, units)
+            return self.get_current_weather(first, second, units)
+        
+        return self._fetch_many(fetch, locations, max_workers)
+    
+    def get_forecast_many(self, locations: Iterable, units: str = "metric",
+                          max_workers: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Get 5-day forecasts for many locations concurrently
+        
+        Args:
+            locations: Cities or coordinates, as for get_current_weather_many
+            units: Temperature units
+            max_workers: Maximum requests in flight (defaults to the pool size)
+            
+        Yields:
+            Dictionaries with 'location', 'data' and 'error' in completion order
+        """
+        def fetch(location):
+            kind, first, second = split_location(location)
+            if kind == 'coords':
+                return self.get_forecast_by_coordinates(first, second, units)
+            return self.get_forecast(first, second, units)
+        
+        return self._fetch_many(fetch, locations, max_workers)
+    
+    def _fetch_many(self, fetch, locations: Iterable, max_workers: Optional[int]) -> Iterator[Dict]:
+        """
+        Fan out fetch over locations with at most max_workers in flight
+        
+        Cache hits return without occupying a worker for long, and all
+        workers share the pooled transport. Failures are reported per item.
+        Workers run in a copy of the caller's context, so a surrounding
+        priority(BACKGROUND) block applies to the whole batch.
+        """
+        max_workers = max_workers or self.transport.pool_size
+        context = contextvars.copy_context()
+        pending = {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather-batch") as executor:
+            iterator = iter(locations)
+            
+            # Keep a bounded window of submitted work so huge inputs stay cheap
+            for location in iterator:
+                pending[executor.submit(context.copy().run, fetch, location)] = location
+                if len(pending) >= max_workers * 2:
+                    break
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    location = pending.pop(future)
+                    
+                    try:
+                        yield {'location': location, 'data': future.result(), 'error': None}
+                    except Exception as e:
+                        yield {'location': location, 'data': None, 'error': str(e)}
+                    
+                    for location in iterator:
+                        pending[executor.submit(context.copy().run, fetch, location)] = location
+                        break
+    
     def get_icon_url(self, icon_code: str, size: str = "2x") -> str:
         """
         Get weather icon URL
@@ -211,7 +617,8 @@ class WeatherAPI:
         """
         return f"{self.icon_url}/{icon_code}@{size}.png"
     
-    def format_weather_data(self, data: Dict) -> Dict:
+    @staticmethod
+    def format_weather_data(data: Dict) -> Dict:
         """
         Format weather data for display
         
@@ -261,16 +668,23 @@ class WeatherAPI:
         except KeyError as e:
             raise Exception(f"Data formatting error: {str(e)}")
     
-    def format_forecast_data(self, data: Dict) -> List[Dict]:
+    def format_forecast_data(self, data: Dict, columnar: bool = False) -> List[Dict]:
         """
         Format forecast data for display
         
         Args:
             data: Raw forecast data from API
+            columnar: Return a ForecastColumns (NumPy arrays, needs numpy)
+                      instead of a list of dictionaries. It still indexes
+                      and iterates like the list.
             
         Returns:
             List of formatted forecast entries
         """
+        if columnar:
+            from weather_columns import ForecastColumns
+            return ForecastColumns.from_api(data)
+        
         if not data or 'list' not in data:
             return []
             
@@ -309,20 +723,43 @@ class WeatherAPI:
         except KeyError as e:
             raise Exception(f"Forecast formatting error: {str(e)}")
     
-    def get_daily_forecast(self, forecast_data: List[Dict], days: int = 5) -> List[Dict]:
+    def get_daily_forecast(self, forecast_data: List[Dict], days: int = 5) -> List:
         """
         Convert 3-hourly forecast to daily forecast
         
+        Columnar forecasts (format_forecast_data(..., columnar=True)) are
+        aggregated by weather_columns.aggregate_daily; a multi-city batch
+        gives one list of days per city:
+        
+        >>> from weather_columns import ForecastColumns
+        >>> from weather_synthetic import generate_forecast
+        >>> api = WeatherAPI(api_key='doctest', use_city_index=False)
+        >>> batch = generate_forecast(3, days=5, seed=1).columns
+        >>> daily = api.get_daily_forecast(batch)
+        >>> len(daily), daily[2] == api.get_daily_forecast(batch.city(2))
+        (3, True)
+        
+        Lists of formatted dictionaries keep the loop below as a fallback.
+        
         Args:
-            forecast_data: Formatted forecast data
+            forecast_data: Formatted forecast data (list or ForecastColumns)
             days: Number of days to return
             
         Returns:
-            List of daily forecast dictionaries
+            List of daily forecast dictionaries, or one such list per city
+            for a multi-city ForecastColumns
         """
+        if not isinstance(forecast_data, list):
+            from weather_columns import ForecastColumns, aggregate_daily, daily_to_dicts
+            if isinstance(forecast_data, ForecastColumns):
+                daily = aggregate_daily(forecast_data, days=days)
+                if forecast_data.city_count > 1:
+                    return [daily_to_dicts(daily, city) for city in range(forecast_data.city_count)]
+                return daily_to_dicts(daily)
+        
         if not forecast_data:
             return []
-            
+        
         daily_forecast = []
         current_date = None
         day_data = []
@@ -383,18 +820,96 @@ class WeatherAPI:
         }
 
 
-def get_sample_weather_data() -> Dict:
+def _retries(response: requests.Response) -> int:
+    """Extra attempts urllib3 made before returning the response"""
+    retry = getattr(response.raw, 'retries', None)
+    return len(retry.history) if retry is not None else 0
+
+
+def split_location(location) -> Tuple[str, Union[str, float], Union[str, float]]:
+    """
+    Normalize a batch location
+    
+    Args:
+        location: "City", "City,CC", (city, country), (lat, lon) or a
+                  dictionary with lat/lon or name/country keys
+            
+    Returns:
+        ('coords', lat, lon) or ('city', city, country)
+    """
+    if isinstance(location, dict):
+        if 'lat' in location and 'lon' in location:
+            return 'coords', float(location['lat']), float(location['lon'])
+        return 'city', location.get('name') or location.get('city', ''), location.get('country', '')
+    
+    if isinstance(location, (tuple, list)):
+        first, second = location
+        if isinstance(first, (int, float)) and isinstance(second, (int, float)):
+            return 'coords', float(first), float(second)
+        return 'city', first, second or ""
+    
+    city, _, country = str(location).partition(',')
+    return 'city', city.strip(), country.strip()
+
+
+# Place used for the sample data
+SAMPLE_PLACE = {'name': 'London', 'country': 'GB', 'lat': 51.5074, 'lon': -0.1278}
+
+
+def get_sample_weather_data(seed: Optional[int] = None) -> Dict:
     """
     Get sample weather data for demonstration
     
+    Generated by weather_synthetic, so it varies with the time of day and
+    season like real data. Without numpy a fixed profile is returned.
+    
+    Args:
+        seed: Random seed for repeatable data
+    
     Returns:
         Sample weather data dictionary
     """
+    try:
+        from weather_synthetic import generate_forecast
+    except ImportError:
+        return _fixed_sample_weather_data()
+    
+    # The most recent 3-hour step stands in for the current conditions
+    start = int(datetime.now().timestamp()) // 10800 * 10800
+    payload = generate_forecast([SAMPLE_PLACE], days=1, seed=seed, start=start).weather_payload(0)
+    return WeatherAPI.format_weather_data(payload)
+
+
+def get_sample_forecast_data(days: int = 5, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Get sample forecast data for demonstration
+    
+    Generated by weather_synthetic with diurnal cycles, passing fronts and
+    precipitation; without numpy a fixed profile is returned. Use
+    weather_synthetic directly for many cities or raw API payloads.
+    
+    Args:
+        days: Number of days (8 entries per day)
+        seed: Random seed for repeatable data
+    
+    Returns:
+        List of sample forecast entries
+    """
+    try:
+        from weather_synthetic import generate_forecast
+    except ImportError:
+        return _fixed_sample_forecast_data(days)
+    
+    return generate_forecast([SAMPLE_PLACE], days=days, seed=seed).columns.as_dicts()
+
+
+def _fixed_sample_weather_data() -> Dict:
+    """Fixed sample weather data, used when numpy is not installed"""
     return {
         'location': {
-            'city': 'London',
-            'country': 'GB',
-            'coordinates': {'lat': 51.5074, 'lon': -0.1278}
+            'city': SAMPLE_PLACE['name'],
+            'country': SAMPLE_PLACE['country'],
+            'coordinates': {'lat': SAMPLE_PLACE['lat'], 'lon': SAMPLE_PLACE['lon']}
         },
         'current': {
             'temperature': 20.5,
@@ -419,17 +934,12 @@ def get_sample_weather_data() -> Dict:
     }
 
 
-def get_sample_forecast_data() -> List[Dict]:
-    """
-    Get sample forecast data for demonstration
-    
-    Returns:
-        List of sample forecast entries
-    """
+def _fixed_sample_forecast_data(days: int = 5) -> List[Dict]:
+    """Fixed sample forecast data, used when numpy is not installed"""
     base_date = datetime.now()
     forecast_data = []
     
-    for i in range(40):  # 5 days * 8 forecasts per day
+    for i in range(days * 8):
         forecast_time = base_date + timedelta(hours=i * 3)
         
         # Simple temperature variation
@@ -1,4 +1,3 @@
-weather  _app.py
 #!/usr/bin/env python3
 """
 Weather App with Tkinter GUI
@@ -8,17 +7,21 @@ and displays it in a user-friendly interface.
 
 import tkinter as tk
 from tkinter import ttk, messagebox, font
-import requests
 import json
 from datetime import datetime
-from PIL import Image, ImageTk
 import os
-from io import BytesIO
 import threading
 
+from weather_api import WeatherAPI, split_location
+from weather_gazetteer import load_default_index
+from weather_icons import IconStore
+from weather_ratelimit import BACKGROUND
+from weather_scheduler import RefreshScheduler
+from weather_workers import WorkerPool
+
 
 class WeatherApp:
-    def _init_(self, root):
+    def __init__(self, root):
         self.root = root
         self.root.title("Weather App")
         self.root.geometry("800x600")
@@ -26,12 +29,48 @@ class WeatherApp:
         
         # Weather API configuration
         self.api_key = "YOUR_API_KEY_HERE"  # Replace with your OpenWeatherMap API key
-        self.base_url = "https://api.openweathermap.org/data/2.5/weather"
-        self.forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
+        
+        # One client for every request: pooled connections, response cache, quota metering
+        self.api = WeatherAPI(api_key=self.api_key)
+        
+        # Offline city index for autocomplete (no API calls per keystroke)
+        self.city_index = load_default_index()
+        self.suggestions = []
+        self.suggest_job = None
+        
+        # Searches run on a small fixed pool; only the latest per panel is shown
+        self.workers = WorkerPool(workers=3)
+        
+        # Pinned cities, refreshed in the background at each endpoint's update interval
+        self.scheduler = RefreshScheduler()
+        self.pinned_rows = {}
+        self.displayed_city = None
+        
+        # Icons: ready PhotoImages in memory, resized PNGs on disk, loaded off the UI thread
+        self.icon_store = IconStore(size=(80, 80), transport=self.api.transport, icon_url=self.api.icon_url)
+        self.icon_images = {}
+        self.current_icon = None
         
         # Create the interface
         self.create_widgets()
         
+        # Optionally pre-warm the full icon set so later searches never wait on
+        # an icon download; sample mode (no API key) stays offline
+        if os.getenv('WEATHER_PREWARM_ICONS', '0') == '1' and self.api_key != "YOUR_API_KEY_HERE":
+            thread = threading.Thread(target=self.prewarm_icons)
+            thread.daemon = True
+            thread.start()
+        
+        # Apply finished searches in batches on the Tk thread
+        self.deliver_results()
+        
+        # Restore pins (e.g. WEATHER_PINNED_CITIES="London,GB;Paris,FR") and start
+        # refreshing; sample mode (no API key) never calls the live API
+        if self.api_key != "YOUR_API_KEY_HERE":
+            for city in filter(None, os.getenv('WEATHER_PINNED_CITIES', '').split(';')):
+                self.pin_city(city.strip())
+            self.refresh_pinned()
+        
         # Load default weather
         self.load_default_weather()
     
@@ -61,6 +100,9 @@ class WeatherApp:
                                   font=("Helvetica", 12), width=30)
         self.city_entry.pack(side=tk.LEFT, padx=(0, 10))
         self.city_entry.bind('<Return>', self.on_search)
+        self.city_entry.bind('<KeyRelease>', self.schedule_suggestions)
+        self.city_entry.bind('<Down>', self.focus_suggestions)
+        self.city_entry.bind('<Escape>', self.hide_suggestions)
         
         # Search button
         search_btn = tk.Button(search_frame, text="Get Weather", 
@@ -70,6 +112,14 @@ class WeatherApp:
                               relief=tk.FLAT, padx=20)
         search_btn.pack(side=tk.LEFT)
         
+        # Pin button
+        pin_btn = tk.Button(search_frame, text="📌 Pin", 
+                           command=self.pin_displayed_city, 
+                           font=("Helvetica", 12), 
+                           bg='#7f8c8d', fg='white',
+                           relief=tk.FLAT, padx=10)
+        pin_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
         # Weather display frame
         self.weather_frame = tk.Frame(main_frame, bg='#34495e', relief=tk.RAISED, bd=2)
         self.weather_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
@@ -77,6 +127,10 @@ class WeatherApp:
         # Create weather display widgets
         self.create_weather_display()
         
+        # Pinned cities, one row each
+        self.pinned_frame = tk.Frame(main_frame, bg='#2c3e50')
+        self.pinned_frame.pack(fill=tk.X, pady=(0, 10))
+        
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
@@ -84,6 +138,14 @@ class WeatherApp:
                              relief=tk.SUNKEN, anchor=tk.W, 
                              bg='#2c3e50', fg='#ecf0f1')
         status_bar.pack(fill=tk.X, side=tk.BOTTOM)
+        
+        # Autocomplete dropdown, placed under the entry when there are matches
+        self.suggestion_list = tk.Listbox(self.root, font=("Helvetica", 11), height=6,
+                                          bg='#ecf0f1', fg='#2c3e50',
+                                          activestyle='none', relief=tk.FLAT)
+        self.suggestion_list.bind('<ButtonRelease-1>', self.on_suggestion_selected)
+        self.suggestion_list.bind('<Return>', self.on_suggestion_selected)
+        self.suggestion_list.bind('<Escape>', self.hide_suggestions)
     
     def create_weather_display(self):
         """Create the weather information display area"""
@@ -122,6 +184,18 @@ class WeatherApp:
         # Create detail labels
         self.create_detail_labels(details_frame)
         
+        # Daily forecast strip
+        forecast_frame = tk.Frame(self.weather_frame, bg='#34495e')
+        forecast_frame.pack(pady=(0, 20), padx=20, fill=tk.X)
+        
+        self.forecast_labels = []
+        for _ in range(5):
+            label = tk.Label(forecast_frame, text="--", 
+                            font=("Helvetica", 10), justify=tk.CENTER,
+                            bg='#2c3e50', fg='#ecf0f1', padx=8, pady=6)
+            label.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=3)
+            self.forecast_labels.append(label)
+        
     def create_detail_labels(self, parent):
         """Create detailed weather information labels"""
         # First row
@@ -168,8 +242,68 @@ class WeatherApp:
         
     def on_search(self, event=None):
         """Handle Enter key press in search field"""
+        self.hide_suggestions()
+        self.get_weather()
+    
+    def schedule_suggestions(self, event=None):
+        """Debounce typing: refresh suggestions once keystrokes pause"""
+        if event is not None and event.keysym in ('Return', 'Escape', 'Down', 'Up'):
+            return
+        
+        if self.suggest_job is not None:
+            self.root.after_cancel(self.suggest_job)
+        self.suggest_job = self.root.after(150, self.update_suggestions)
+    
+    def update_suggestions(self):
+        """Refresh the autocomplete dropdown from the offline city index"""
+        self.suggest_job = None
+        
+        text = self.city_var.get().strip()
+        self.suggestions = self.city_index.suggest(text, limit=6) if len(text) >= 2 else []
+        
+        labels = [f"{item['name']}, {item['country']}" for item in self.suggestions]
+        if not labels or labels == [text]:
+            self.hide_suggestions()
+            return
+        
+        self.suggestion_list.delete(0, tk.END)
+        for label in labels:
+            self.suggestion_list.insert(tk.END, label)
+        self.suggestion_list.config(height=len(labels))
+        
+        x = self.city_entry.winfo_rootx() - self.root.winfo_rootx()
+        y = self.city_entry.winfo_rooty() - self.root.winfo_rooty() + self.city_entry.winfo_height()
+        self.suggestion_list.place(x=x, y=y, width=self.city_entry.winfo_width())
+        self.suggestion_list.lift()
+    
+    def focus_suggestions(self, event=None):
+        """Move keyboard focus into the dropdown"""
+        if self.suggestions:
+            self.suggestion_list.focus_set()
+            self.suggestion_list.selection_clear(0, tk.END)
+            self.suggestion_list.selection_set(0)
+            self.suggestion_list.activate(0)
+    
+    def on_suggestion_selected(self, event=None):
+        """Search for the chosen suggestion"""
+        selection = self.suggestion_list.curselection()
+        if not selection:
+            return
+        
+        item = self.suggestions[selection[0]]
+        self.city_var.set(f"{item['name']},{item['country']}")
+        self.hide_suggestions()
+        self.city_entry.focus_set()
+        self.city_entry.icursor(tk.END)
         self.get_weather()
     
+    def hide_suggestions(self, event=None):
+        """Hide the autocomplete dropdown"""
+        if self.suggest_job is not None:
+            self.root.after_cancel(self.suggest_job)
+            self.suggest_job = None
+        self.suggestion_list.place_forget()
+    
     def get_weather(self):
         """Fetch weather data from API"""
         city = self.city_var.get().strip()
@@ -178,35 +312,115 @@ class WeatherApp:
             return
         
         self.status_var.set("Fetching weather data...")
-        self.root.update()
         
-        # Run API request in a separate thread to avoid blocking GUI
-        thread = threading.Thread(target=self.fetch_weather_data, args=(city,))
-        thread.daemon = True
-        thread.start()
+        # Queue both requests; a newer search supersedes any still pending
+        self.workers.submit('weather', self.fetch_weather_data, city)
+        self.workers.submit('forecast', self.fetch_forecast_data, city)
     
-    def fetch_weather_data(self, city):
-        """Fetch weather data in a separate thread"""
-        try:
-            # Construct API URL
-            url = f"{self.base_url}?q={city}&appid={self.api_key}&units=metric"
-            
-            # Make API request
-            response = requests.get(url, timeout=10)
-            data = response.json()
-            
-            if response.status_code == 200:
-                # Update GUI in main thread
-                self.root.after(0, self.update_weather_display, data)
-                self.root.after(0, self.status_var.set, "Weather data updated successfully")
-            else:
-                error_msg = data.get('message', 'Unknown error')
-                self.root.after(0, self.show_error, f"Error: {error_msg}")
-                
-        except requests.RequestException as e:
-            self.root.after(0, self.show_error, f"Network error: {str(e)}")
-        except Exception as e:
-            self.root.after(0, self.show_error, f"Unexpected error: {str(e)}")
+    def fetch_weather_data(self, city, fresh=False):
+        """Fetch current weather data in a worker thread (fresh skips the cache)"""
+        _, name, country = split_location(city)
+        return self.api.get_current_weather(name, country, fresh=fresh)
+    
+    def fetch_forecast_data(self, city, fresh=False):
+        """Fetch the forecast and aggregate it to days, off the UI thread (fresh skips the cache)"""
+        from weather_columns import aggregate_daily
+        
+        _, name, country = split_location(city)
+        forecast = self.api.format_forecast_data(self.api.get_forecast(name, country, fresh=fresh), columnar=True)
+        return aggregate_daily(forecast, days=5)
+    
+    def deliver_results(self):
+        """Apply the latest finished searches in one batch, then poll again"""
+        for slot, result, error in self.workers.drain():
+            if slot == 'weather':
+                if error is not None:
+                    self.show_error(str(error))
+                else:
+                    self.update_weather_display(result)
+                    self.status_var.set("Weather data updated successfully")
+            elif slot == 'forecast' and error is None:
+                self.update_forecast_display(result)
+            elif slot == 'icon' and error is None:
+                self.on_icon_loaded(*result)
+            elif slot[0] == 'pinned' and error is None:
+                self.update_pinned_row(slot[1], slot[2], result)
+        
+        self.root.after(50, self.deliver_results)
+    
+    def pin_displayed_city(self):
+        """Pin the city currently shown"""
+        if self.displayed_city is None:
+            self.status_var.set("Search for a city before pinning it")
+            return
+        self.pin_city(self.displayed_city)
+    
+    def pin_city(self, city):
+        """Add a row for a city and schedule its refreshes"""
+        if city in self.pinned_rows:
+            return
+        
+        row = tk.Frame(self.pinned_frame, bg='#34495e')
+        row.pack(fill=tk.X, pady=2)
+        
+        labels = {}
+        for name, width in (('city', 18), ('temp', 6), ('description', 18), ('outlook', 12)):
+            label = tk.Label(row, text="--", width=width, anchor=tk.W,
+                            font=("Helvetica", 11), bg='#34495e', fg='#ecf0f1')
+            label.pack(side=tk.LEFT, padx=5)
+            labels[name] = label
+        labels['city'].config(text=city.replace(',', ', '), cursor='hand2')
+        labels['city'].bind('<Button-1>', lambda event: self.show_pinned_city(city))
+        
+        unpin_btn = tk.Button(row, text="✕", command=lambda: self.unpin_city(city),
+                             bg='#34495e', fg='#ecf0f1', relief=tk.FLAT)
+        unpin_btn.pack(side=tk.RIGHT)
+        
+        self.pinned_rows[city] = {'frame': row, 'labels': labels, 'values': {}}
+        self.scheduler.pin(city)
+    
+    def unpin_city(self, city):
+        """Remove a pinned city and stop refreshing it"""
+        self.scheduler.unpin(city)
+        row = self.pinned_rows.pop(city, None)
+        if row is not None:
+            row['frame'].destroy()
+    
+    def show_pinned_city(self, city):
+        """Search for a pinned city"""
+        self.city_var.set(city)
+        self.get_weather()
+    
+    def refresh_pinned(self):
+        """Queue the pinned-city refreshes that are due, then check again in a second"""
+        fetchers = {'weather': self.fetch_weather_data, 'forecast': self.fetch_forecast_data}
+        for city, endpoint in self.scheduler.due():
+            # Fetch past the cache: the interval matches its TTL, so a cached
+            # entry would still be fresh or only served stale
+            self.workers.submit(('pinned', city, endpoint), fetchers[endpoint], city, True, level=BACKGROUND)
+        
+        self.root.after(1000, self.refresh_pinned)
+    
+    def update_pinned_row(self, city, endpoint, result):
+        """Redraw only the labels of a pinned row whose text changed"""
+        row = self.pinned_rows.get(city)
+        if row is None:
+            return
+        
+        if endpoint == 'weather':
+            texts = {
+                'temp': f"{round(result['main']['temp'])}°C",
+                'description': result['weather'][0]['description'].title()
+            }
+        else:
+            if not len(result['date']):
+                return
+            texts = {'outlook': f"{result['temp_max'][0]:.0f}° / {result['temp_min'][0]:.0f}°"}
+        
+        for name, text in texts.items():
+            if row['values'].get(name) != text:
+                row['labels'][name].config(text=text)
+                row['values'][name] = text
     
     def update_weather_display(self, data):
         """Update the weather display with fetched data"""
@@ -224,6 +438,7 @@ class WeatherApp:
             icon_code = data['weather'][0]['icon']
             
             # Update labels
+            self.displayed_city = f"{city_name},{country}"
             self.city_label.config(text=f"{city_name}, {country}")
             self.temp_label.config(text=f"{temp}°C")
             self.desc_label.config(text=description)
@@ -240,23 +455,61 @@ class WeatherApp:
         except KeyError as e:
             self.show_error(f"Data parsing error: {str(e)}")
     
+    def update_forecast_display(self, daily):
+        """Update the daily forecast strip from aggregate_daily output"""
+        dates = daily['date'].tolist()
+        
+        for i, label in enumerate(self.forecast_labels):
+            if i >= len(dates):
+                label.config(text="--")
+                continue
+            
+            description = daily['conditions'][daily['condition'][i]][1]
+            label.config(text=f"{dates[i].strftime('%a')}\n"
+                              f"{daily['temp_max'][i]:.0f}° / {daily['temp_min'][i]:.0f}°\n"
+                              f"{description}")
+    
     def load_weather_icon(self, icon_code):
-        """Load weather icon from OpenWeatherMap"""
+        """Show a weather icon, loading it on the worker pool on a cache miss"""
+        self.current_icon = icon_code
+        
+        photo = self.icon_images.get(icon_code)
+        if photo is not None:
+            self.weather_icon.config(image=photo, text="")
+            return
+        
+        # One slot for the card, so a burst of searches only loads the last icon
+        self.workers.submit('icon', self.fetch_weather_icon, icon_code)
+    
+    def fetch_weather_icon(self, icon_code):
+        """Read or download and resize an icon in a worker thread"""
         try:
-            icon_url = f"https://openweathermap.org/img/wn/{icon_code}@2x.png"
-            response = requests.get(icon_url, timeout=10)
+            image = self.icon_store.load(icon_code)
+        except Exception:
+            image = None
+        return icon_code, image
+    
+    def prewarm_icons(self):
+        """Load every OpenWeatherMap icon in a separate thread"""
+        for icon_code, image in self.icon_store.prewarm():
+            if image is not None:
+                self.root.after(0, self.on_icon_loaded, icon_code, image)
+    
+    def on_icon_loaded(self, icon_code, image):
+        """Cache a loaded icon as a PhotoImage and show it if it is still wanted"""
+        if image is not None and icon_code not in self.icon_images:
+            from PIL import ImageTk
             
-            if response.status_code == 200:
-                image = Image.open(BytesIO(response.content))
-                image = image.resize((80, 80), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(image)
-                self.weather_icon.config(image=photo)
-                self.weather_icon.image = photo  # Keep a reference
-            else:
-                self.weather_icon.config(text="No Icon", fg='#ecf0f1')
-                
-        except Exception as e:
-            self.weather_icon.config(text="No Icon", fg='#ecf0f1')
+            self.icon_images[icon_code] = ImageTk.PhotoImage(image)
+        
+        if icon_code != self.current_icon:
+            return
+        
+        photo = self.icon_images.get(icon_code)
+        if photo is not None:
+            self.weather_icon.config(image=photo, text="")
+        else:
+            self.weather_icon.config(image="", text="No Icon", fg='#ecf0f1')
     
     def show_error(self, message):
         """Show error message"""
@@ -302,5 +555,5 @@ def main():
     root.mainloop()
 
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     main()
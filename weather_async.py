@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Async Weather API Module
+asyncio client mirroring WeatherAPI, for pollers and async web frontends
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from weather_api import WeatherAPI, split_location
+from weather_cache import ResponseCache, FRESH, STALE
+from weather_gazetteer import CityIndex, load_default_index
+from weather_metrics import ClientMetrics, default_metrics, status_class
+from weather_ratelimit import AsyncRateLimiter, BACKGROUND, RATE_LIMITED_MESSAGE, priority, request_priority
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls with the same key into one task"""
+
+    def __init__(self):
+        self._flights: Dict[tuple, asyncio.Future] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: tuple, fn, *args):
+        """
+        Await fn(*args), or join an identical call already in flight
+
+        Args:
+            key: Identity of the call
+            fn: Coroutine function performing the upstream call
+
+        Returns:
+            The shared result; the shared exception is raised to every caller
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            flight = asyncio.ensure_future(fn(*args))
+            self._flights[key] = flight
+            flight.add_done_callback(lambda _: self._flights.pop(key, None))
+
+        # Shield so one cancelled caller doesn't cancel the shared call
+        return await asyncio.shield(flight)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters
+
+        Returns:
+            Dictionary with upstream calls made, callers coalesced and calls in flight
+        """
+        total = self.calls + self.coalesced
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._flights),
+            'saved_ratio': self.coalesced / total if total else 0.0
+        }
+
+
+class AsyncWeatherAPI:
+    """asyncio weather API handler with bounded concurrency"""
+
+    CACHE_TTLS = WeatherAPI.CACHE_TTLS
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    # Formatting helpers are plain data transforms, shared with the sync client
+    get_icon_url = WeatherAPI.get_icon_url
+    format_weather_data = staticmethod(WeatherAPI.format_weather_data)
+    format_forecast_data = WeatherAPI.format_forecast_data
+    get_daily_forecast = WeatherAPI.get_daily_forecast
+    _process_daily_data = WeatherAPI._process_daily_data
+    _cache_key = WeatherAPI._cache_key
+    suggest_cities = WeatherAPI.suggest_cities
+
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: int = 100,
+                 pool_size: int = 100, timeout: float = 10, max_retries: int = 3,
+                 backoff_factor: float = 0.5,
+                 cache: Optional[ResponseCache] = None,
+                 cache_ttls: Optional[Dict[str, float]] = None,
+                 stale_while_revalidate: bool = True,
+                 city_index: Optional[CityIndex] = None,
+                 use_city_index: bool = True,
+                 rate_limiter: Optional[AsyncRateLimiter] = None,
+                 calls_per_minute: Optional[int] = None,
+                 calls_per_day: Optional[int] = None,
+                 api_root: Optional[str] = None,
+                 metrics: Optional[ClientMetrics] = None,
+                 interactive_wait: float = 15.0):
+        """
+        Create an async client
+
+        Args:
+            api_key: OpenWeatherMap API key
+            max_concurrency: Maximum requests in flight at once
+            pool_size: Maximum open connections in the aiohttp connector
+            timeout: Per-request timeout in seconds
+            max_retries: Retries for connection errors and retryable statuses
+            backoff_factor: Exponential backoff factor between retries (seconds)
+            cache: Response cache, may be shared with a WeatherAPI instance
+            cache_ttls: Per-endpoint TTL overrides
+            stale_while_revalidate: Serve stale entries while refreshing them
+            city_index: Offline gazetteer consulted before geocoding
+            use_city_index: Load the default city index when none is given
+            rate_limiter: Quota limiter (built from the call budgets when omitted)
+            calls_per_minute: Per-minute call budget (0 disables)
+            calls_per_day: Per-day call budget (0 disables)
+            api_root: API host root (defaults to env OPENWEATHER_API_ROOT, then
+                      https://api.openweathermap.org)
+            metrics: Per-endpoint metrics (defaults to the process metrics when
+                     WEATHER_METRICS_PORT or WEATHER_METRICS_FILE is set)
+            interactive_wait: Seconds an interactive call waits for the limiter
+                              before failing like a 429 (background calls
+                              wait as long as the budget needs)
+        """
+        self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY', 'YOUR_API_KEY_HERE')
+        api_root = (api_root or os.getenv('OPENWEATHER_API_ROOT') or "https://api.openweathermap.org").rstrip('/')
+        self.base_url = f"{api_root}/data/2.5"
+        self.geocoding_url = f"{api_root}/geo/1.0"
+        self.icon_url = "https://openweathermap.org/img/wn"
+
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        self.cache = cache if cache is not None else ResponseCache()
+        self.cache_ttls = dict(self.CACHE_TTLS)
+        if cache_ttls:
+            self.cache_ttls.update(cache_ttls)
+        self.stale_while_revalidate = stale_while_revalidate
+
+        if city_index is None and use_city_index:
+            city_index = load_default_index()
+        self.city_index = city_index
+
+        if rate_limiter is None:
+            if calls_per_minute is None:
+                calls_per_minute = int(os.getenv('OPENWEATHER_CALLS_PER_MINUTE', 60))
+            if calls_per_day is None:
+                calls_per_day = int(os.getenv('OPENWEATHER_CALLS_PER_DAY', 0))
+            if calls_per_minute or calls_per_day:
+                rate_limiter = AsyncRateLimiter(per_minute=calls_per_minute, per_day=calls_per_day)
+        self.rate_limiter = rate_limiter
+        self.interactive_wait = interactive_wait
+        self.metrics = metrics if metrics is not None else default_metrics()
+
+        # Concurrent identical requests share one upstream call
+        self.single_flight = AsyncSingleFlight()
+
+        # Created lazily so they bind to the running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._refreshing = set()
+        self._background = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Cancel background refreshes and close the HTTP session"""
+        for task in list(self._background):
+            task.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def cache_stats(self) -> Dict:
+        """
+        Get response cache hit/miss counters
+
+        Returns:
+            Dictionary of cache counters
+        """
+        return self.cache.stats()
+
+    def coalescing_stats(self) -> Dict[str, int]:
+        """
+        Get single-flight request coalescing counters
+
+        Returns:
+            Dictionary with upstream calls made and callers that shared one
+        """
+        return self.single_flight.stats()
+
+    def rate_limit_stats(self) -> Dict:
+        """
+        Get remaining call budget, queue depth and wait-time metrics
+
+        Returns:
+            Dictionary of rate limiter metrics (empty when metering is disabled)
+        """
+        if self.rate_limiter is None:
+            return {}
+        return self.rate_limiter.stats()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _request_json(self, endpoint: str, url: str, params: Dict, error_prefix: str) -> tuple:
+        """
+        Perform a request with bounded concurrency and retry/backoff
+
+        Every attempt waits for the rate limiter at the current priority.
+
+        Returns:
+            Tuple of (parsed JSON, response size in bytes)
+        """
+        session = self._get_session()
+        metrics = self.metrics
+        level = request_priority.get()
+        wait_limit = self.interactive_wait if level < BACKGROUND else None
+        started = time.perf_counter()
+        attempt = 0
+        size = 0
+        error = None
+        sent = False
+
+        try:
+            while True:
+                retry_after = None
+                if self.rate_limiter is not None:
+                    waited = time.perf_counter()
+                    try:
+                        await self.rate_limiter.acquire(level, timeout=wait_limit)
+                    except Exception:
+                        error = 'rate_limited'
+                        raise Exception(f"{error_prefix}: {RATE_LIMITED_MESSAGE}")
+                    finally:
+                        if metrics is not None:
+                            metrics.record_wait(endpoint, time.perf_counter() - waited)
+
+                sent = True
+                try:
+                    async with self._semaphore:
+                        async with session.get(url, params=params) as response:
+                            body = await response.read()
+                            size += len(body)
+
+                            if response.status == 200:
+                                return await response.json(content_type=None), len(body)
+
+                            if response.status not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                                error = status_class(response.status)
+                                if response.status == 429:
+                                    raise Exception(f"{error_prefix}: {RATE_LIMITED_MESSAGE}")
+                                error_data = await response.json(content_type=None)
+                                raise Exception(f"{error_prefix}: {error_data.get('message', 'Unknown error')}")
+
+                            retry_after = response.headers.get('Retry-After')
+
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt >= self.max_retries:
+                        error = 'timeout' if isinstance(e, asyncio.TimeoutError) else 'connection'
+                        raise
+
+                delay = self.backoff_factor * (2 ** attempt) * (0.5 + random.random())
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                attempt += 1
+                await asyncio.sleep(delay)
+
+        except ValueError:
+            error = error or 'invalid_response'
+            raise
+        finally:
+            # A limiter timeout before the first attempt never reached upstream
+            if metrics is not None and sent:
+                metrics.record_request(endpoint, time.perf_counter() - started, size, error, attempt)
+
+    async def _get_json(self, endpoint: str, url: str, params: Dict, error_prefix: str = "API Error"):
+        """
+        Fetch an endpoint through the response cache
+
+        Stale entries are returned immediately while a background task
+        refreshes them. Concurrent misses for the same key share one call.
+        """
+        ttl = self.cache_ttls.get(endpoint, 0)
+        key = self._cache_key(endpoint, params)
+        if ttl <= 0:
+            if self.metrics is not None:
+                self.metrics.record_cache(endpoint, 'bypass')
+            return (await self.single_flight.do(key, self._request_json, endpoint, url, params, error_prefix))[0]
+
+        data, state = self.cache.get(key)
+
+        if state == FRESH:
+            if self.metrics is not None:
+                self.metrics.record_cache(endpoint, 'hit')
+            return data
+        if state == STALE and self.stale_while_revalidate:
+            if self.metrics is not None:
+                self.metrics.record_cache(endpoint, 'stale')
+            self._schedule_refresh(key, ttl, url, params, error_prefix)
+            return data
+
+        if self.metrics is not None:
+            self.metrics.record_cache(endpoint, 'miss')
+        return await self.single_flight.do(key, self._fetch_and_store, key, ttl, url, params, error_prefix)
+
+    async def _fetch_and_store(self, key: tuple, ttl: float, url: str, params: Dict, error_prefix: str):
+        """Fetch from upstream and cache the response"""
+        data, size = await self._request_json(key[0], url, params, error_prefix)
+        self._store(key, data, ttl, size)
+        return data
+
+    def _store(self, key: tuple, data, ttl: float, size: int):
+        stale_ttl = ttl if self.stale_while_revalidate else 0
+        self.cache.set(key, data, ttl, stale_ttl=stale_ttl, size=size)
+
+    def _schedule_refresh(self, key: tuple, ttl: float, url: str, params: Dict, error_prefix: str):
+        """Refresh a stale entry in a background task, once per key"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                with priority(BACKGROUND):
+                    await self.single_flight.do(key, self._fetch_and_store, key, ttl, url, params, error_prefix)
+            except Exception:
+                # Keep serving the stale entry until its window runs out
+                pass
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _call(self, endpoint: str, url: str, params: Dict, context: str,
+                    error_prefix: str = "API Error"):
+        """Run a cached request, translating errors like the sync client"""
+        try:
+            return await self._get_json(endpoint, url, params, error_prefix)
+        except asyncio.TimeoutError:
+            raise Exception(f"{context}: Network error: request timed out after {self.timeout}s")
+        except aiohttp.ClientError as e:
+            raise Exception(f"{context}: Network error: {str(e)}")
+        except Exception as e:
+            raise Exception(f"{context}: {str(e)}")
+
+    async def get_current_weather(self, city: str, country: str = "", units: str = "metric") -> Optional[Dict]:
+        """
+        Get current weather for a city
+
+        Args:
+            city: City name
+            country: Country code (optional)
+            units: Temperature units (metric, imperial, kelvin)
+
+        Returns:
+            Weather data dictionary
+        """
+        query = f"{city},{country}" if country else city
+        params = {'q': query, 'appid': self.api_key, 'units': units}
+        return await self._call('weather', f"{self.base_url}/weather", params, "Error fetching weather")
+
+    async def get_forecast(self, city: str, country: str = "", units: str = "metric") -> Optional[Dict]:
+        """
+        Get 5-day weather forecast
+
+        Args:
+            city: City name
+            country: Country code (optional)
+            units: Temperature units (metric, imperial, kelvin)
+
+        Returns:
+            Forecast data dictionary
+        """
+        query = f"{city},{country}" if country else city
+        params = {'q': query, 'appid': self.api_key, 'units': units}
+        return await self._call('forecast', f"{self.base_url}/forecast", params, "Error fetching forecast")
+
+    async def get_forecast_by_coordinates(self, lat: float, lon: float, units: str = "metric") -> Optional[Dict]:
+        """
+        Get 5-day weather forecast by coordinates
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            units: Temperature units
+
+        Returns:
+            Forecast data dictionary
+        """
+        params = {'lat': lat, 'lon': lon, 'appid': self.api_key, 'units': units}
+        return await self._call('forecast', f"{self.base_url}/forecast", params, "Error fetching forecast")
+
+    async def get_weather_by_coordinates(self, lat: float, lon: float, units: str = "metric") -> Optional[Dict]:
+        """
+        Get weather by coordinates
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+            units: Temperature units
+
+        Returns:
+            Weather data dictionary
+        """
+        params = {'lat': lat, 'lon': lon, 'appid': self.api_key, 'units': units}
+        return await self._call('weather', f"{self.base_url}/weather", params, "Error fetching weather")
+
+    async def geocode_city(self, city: str, country: str = "", limit: int = 1) -> List[Dict]:
+        """
+        Get coordinates for a city, checking the offline city index first
+
+        Args:
+            city: City name
+            country: Country code (optional)
+            limit: Maximum number of results
+
+        Returns:
+            List of location dictionaries
+        """
+        if self.city_index is not None:
+            matches = self.city_index.lookup(city, country, limit)
+            if matches:
+                return matches
+
+        query = f"{city},{country}" if country else city
+        params = {'q': query, 'limit': limit, 'appid': self.api_key}
+        return await self._call('geocode', f"{self.geocoding_url}/direct", params,
+                                "Error geocoding city", error_prefix="Geocoding error")
+
+    async def get_air_pollution(self, lat: float, lon: float) -> Optional[Dict]:
+        """
+        Get air pollution data
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Air pollution data dictionary
+        """
+        params = {'lat': lat, 'lon': lon, 'appid': self.api_key}
+        return await self._call('air_pollution', f"{self.base_url}/air_pollution", params,
+                                "Error fetching air pollution")
+
+    async def get_current_weather_many(self, locations: Iterable, units: str = "metric",
+                                       max_concurrency: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        Get current weather for many locations concurrently
+
+        Args:
+            locations: Cities or coordinates, as for WeatherAPI.get_current_weather_many
+            units: Temperature units
+            max_concurrency: Maximum lookups in flight (defaults to the client limit)
+
+        Yields:
+            Dictionaries with 'location', 'data' and 'error' in completion order
+        """
+        async def fetch(location):
+            kind, first, second = split_location(location)
+            if kind == 'coords':
+                return await self.get_weather_by_coordinates(first, second, units)
+            return await self.get_current_weather(first, second, units)
+
+        async for result in self._fetch_many(fetch, locations, max_concurrency):
+            yield result
+
+    async def get_forecast_many(self, locations: Iterable, units: str = "metric",
+                                max_concurrency: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        Get 5-day forecasts for many locations concurrently
+
+        Args:
+            locations: Cities or coordinates, as for WeatherAPI.get_current_weather_many
+            units: Temperature units
+            max_concurrency: Maximum lookups in flight (defaults to the client limit)
+
+        Yields:
+            Dictionaries with 'location', 'data' and 'error' in completion order
+        """
+        async def fetch(location):
+            kind, first, second = split_location(location)
+            if kind == 'coords':
+                return await self.get_forecast_by_coordinates(first, second, units)
+            return await self.get_forecast(first, second, units)
+
+        async for result in self._fetch_many(fetch, locations, max_concurrency):
+            yield result
+
+    async def _fetch_many(self, fetch, locations: Iterable, max_concurrency: Optional[int]) -> AsyncIterator[Dict]:
+        """Run fetch over locations with a bounded window of tasks in flight"""
+        limit = max_concurrency or self.max_concurrency
+        iterator = iter(locations)
+        pending = {}
+
+        def submit():
+            for location in iterator:
+                pending[asyncio.ensure_future(fetch(location))] = location
+                return True
+            return False
+
+        try:
+            while len(pending) < limit and submit():
+                pass
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    location = pending.pop(task)
+                    try:
+                        yield {'location': location, 'data': task.result(), 'error': None}
+                    except Exception as e:
+                        yield {'location': location, 'data': None, 'error': str(e)}
+                    submit()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Weather Cache Module
+Bounded in-memory TTL + LRU response cache with stale-while-revalidate,
+plus an optional SQLite backend shared between processes
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+# Cache lookup states
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+
+class ResponseCache:
+    """Thread-safe LRU cache bounded by entry count and byte size"""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Create a response cache
+
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached response bodies
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (value, size, fresh_until, stale_until)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, state) where state is 'fresh', 'stale' or 'miss'
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None, MISS
+
+            value, size, fresh_until, stale_until = entry
+
+            if now <= fresh_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, FRESH
+
+            if now <= stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return value, STALE
+
+            # Past the stale window, drop it
+            del self._entries[key]
+            self._bytes -= size
+            self.misses += 1
+            return None, MISS
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0, size: int = 0):
+        """
+        Store a response
+
+        Args:
+            key: Cache key
+            value: Parsed response
+            ttl: Seconds the entry is served as fresh
+            stale_ttl: Extra seconds the entry may be served stale while refreshing
+            size: Size of the response body in bytes
+        """
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        now = time.monotonic()
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            self._entries[key] = (value, size, now + ttl, now + ttl + stale_ttl)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[1]
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Remove a single entry"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary of hit/miss counters and current occupancy
+        """
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+
+class SQLiteResponseCache:
+    """Persistent response cache shared between processes via SQLite in WAL mode"""
+
+    # Run expiry/size pruning once every this many writes
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 50000, timeout: float = 5.0):
+        """
+        Open (or create) an on-disk response cache
+
+        Args:
+            path: SQLite database file path
+            max_entries: Maximum number of rows kept on disk
+            timeout: Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fresh_until REAL NOT NULL,
+                stale_until REAL NOT NULL,
+                stored_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_stale ON responses (stale_until)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return json.dumps(key, separators=(',', ':'))
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, state) where state is 'fresh', 'stale' or 'miss'
+        """
+        value, state, _ = self.get_with_expiry(key)
+        return value, state
+
+    def get_with_expiry(self, key: Hashable) -> Tuple[Optional[Any], str, Tuple[float, float]]:
+        """
+        Look up a cached response along with its absolute expiry times
+
+        Returns:
+            Tuple of (value, state, (fresh_until, stale_until)) in epoch seconds
+        """
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT value, fresh_until, stale_until FROM responses WHERE key = ?",
+            (self._encode_key(key),)
+        ).fetchone()
+
+        if row is None or now > row[2]:
+            with self._lock:
+                self.misses += 1
+            return None, MISS, (0.0, 0.0)
+
+        value, fresh_until, stale_until = row
+        if now <= fresh_until:
+            state = FRESH
+            with self._lock:
+                self.hits += 1
+        else:
+            state = STALE
+            with self._lock:
+                self.stale_hits += 1
+
+        return json.loads(value), state, (fresh_until, stale_until)
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0, size: int = 0):
+        """
+        Store a response
+
+        Args:
+            key: Cache key
+            value: JSON-serializable response
+            ttl: Seconds the entry is served as fresh
+            stale_ttl: Extra seconds the entry may be served stale while refreshing
+            size: Ignored, the stored JSON length is used instead
+        """
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        text = json.dumps(value, separators=(',', ':'))
+        self._connection().execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, fresh_until, stale_until, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self._encode_key(key), text, len(text), now + ttl, now + ttl + stale_ttl, now)
+        )
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Delete expired rows and trim the table to the max_entries newest rows"""
+        conn = self._connection()
+        expired = conn.execute("DELETE FROM responses WHERE stale_until < ?", (time.time(),)).rowcount
+        trimmed = conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        with self._lock:
+            self.evictions += max(expired, 0) + max(trimmed, 0)
+
+    def invalidate(self, key: Hashable):
+        """Remove a single entry"""
+        self._connection().execute("DELETE FROM responses WHERE key = ?", (self._encode_key(key),))
+
+    def clear(self):
+        """Remove all entries"""
+        self._connection().execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary of hit/miss counters for this process and table occupancy
+        """
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                'entries': entries,
+                'bytes': size
+            }
+
+
+class TieredCache:
+    """In-memory cache in front of a persistent cache"""
+
+    def __init__(self, memory: ResponseCache, disk: SQLiteResponseCache):
+        """
+        Combine a memory and a disk cache
+
+        Args:
+            memory: Per-process LRU cache checked first
+            disk: Shared on-disk cache used on memory misses
+        """
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """
+        Look up a response in memory, then on disk
+
+        Disk hits are promoted into memory with their remaining lifetime.
+        """
+        value, state = self.memory.get(key)
+        if state != MISS:
+            return value, state
+
+        value, state, (fresh_until, stale_until) = self.disk.get_with_expiry(key)
+        if state != MISS:
+            now = time.time()
+            ttl = max(fresh_until - now, 0)
+            stale_ttl = stale_until - now - ttl
+            if ttl > 0:
+                self.memory.set(key, value, ttl, stale_ttl=stale_ttl, size=len(json.dumps(value)))
+        return value, state
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0, size: int = 0):
+        """Store a response in both tiers"""
+        self.memory.set(key, value, ttl, stale_ttl=stale_ttl, size=size)
+        self.disk.set(key, value, ttl, stale_ttl=stale_ttl, size=size)
+
+    def invalidate(self, key: Hashable):
+        """Remove a single entry from both tiers"""
+        self.memory.invalidate(key)
+        self.disk.invalidate(key)
+
+    def clear(self):
+        """Remove all entries from both tiers"""
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Get counters for both tiers
+
+        Returns:
+            Dictionary with 'memory' and 'disk' counter dictionaries
+        """
+        return {'memory': self.memory.stats(), 'disk': self.disk.stats()}
+
+
+class _Flight:
+    """One in-flight upstream call and the callers waiting on it"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn, *args):
+        """
+        Run fn(*args), or wait for an identical call already in flight
+
+        Args:
+            key: Identity of the call
+            fn: Function performing the upstream call
+
+        Returns:
+            The shared result; the shared exception is raised to every caller
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(*args)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters
+
+        Returns:
+            Dictionary with upstream calls made, callers coalesced and calls in flight
+        """
+        with self._lock:
+            total = self.calls + self.coalesced
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._flights),
+                'saved_ratio': self.coalesced / total if total else 0.0
+            }
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Weather Columns Module
+Columnar, array-backed forecast representation
+"""
+
+import sys
+from datetime import datetime
+from time import localtime
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+# Numeric fields gathered in one pass, in row order of the parsing block
+NUMERIC_FIELDS = (
+    'temp', 'feels_like', 'temp_min', 'temp_max',
+    'humidity', 'pressure',
+    'wind_speed', 'wind_direction', 'wind_gust',
+    'visibility', 'precipitation'
+)
+
+# Fields stored as small integers, the rest stay float64
+INT_FIELDS = {'humidity': np.int16, 'pressure': np.int16, 'wind_direction': np.int16}
+
+
+class ForecastColumns:
+    """
+    Forecast entries for one or more cities as contiguous NumPy arrays
+
+    Rows for city i are offsets[i]:offsets[i + 1]. Weather conditions are
+    interned: ``condition`` holds indices into ``conditions``, a list of
+    (main, description, icon) tuples.
+
+    The object also behaves as a read-only sequence of the dictionaries
+    format_forecast_data returns, so existing callers keep working.
+    """
+
+    __slots__ = ('time', 'temp', 'feels_like', 'temp_min', 'temp_max',
+                 'humidity', 'pressure', 'wind_speed', 'wind_direction',
+                 'wind_gust', 'visibility', 'precipitation',
+                 'condition', 'conditions', 'offsets', 'cities')
+
+    def __init__(self, time: np.ndarray, columns: Dict[str, np.ndarray], condition: np.ndarray,
+                 conditions: List[tuple], offsets: Optional[np.ndarray] = None,
+                 cities: Optional[List[Dict]] = None):
+        """
+        Args:
+            time: Forecast times as int64 Unix seconds
+            columns: Numeric columns keyed by NUMERIC_FIELDS name
+            condition: Index into conditions for every row
+            conditions: Interned (main, description, icon) tuples
+            offsets: Row offsets per city (defaults to a single city)
+            cities: City metadata per city (name, country, coord, timezone)
+        """
+        self.time = time
+        for name in NUMERIC_FIELDS:
+            setattr(self, name, columns[name])
+        self.condition = condition
+        self.conditions = conditions
+        self.offsets = offsets if offsets is not None else np.array([0, len(time)], dtype=np.int64)
+        self.cities = cities if cities is not None else [{}]
+
+    @classmethod
+    def from_api(cls, data: Dict) -> 'ForecastColumns':
+        """
+        Build columns from a raw forecast API response
+
+        Args:
+            data: Raw forecast data from API
+
+        Returns:
+            Columnar forecast for one city
+        """
+        items = data.get('list', []) if data else []
+        n = len(items)
+
+        time = np.empty(n, dtype=np.int64)
+        condition = np.empty(n, dtype=np.int16)
+        rows = []
+        lookup: Dict[tuple, int] = {}
+        conditions: List[tuple] = []
+
+        try:
+            for i, item in enumerate(items):
+                main = item['main']
+                wind = item['wind']
+                weather = item['weather'][0]
+
+                time[i] = item['dt']
+                rows.append((
+                    round(main['temp'], 1), round(main['feels_like'], 1),
+                    round(main['temp_min'], 1), round(main['temp_max'], 1),
+                    main['humidity'], main['pressure'],
+                    wind['speed'], wind.get('deg', 0), wind.get('gust', 0),
+                    item.get('visibility', 0) / 1000,
+                    item.get('rain', {}).get('3h', 0) + item.get('snow', {}).get('3h', 0)
+                ))
+
+                key = (weather['main'], weather['description'], weather['icon'])
+                code = lookup.get(key)
+                if code is None:
+                    code = lookup[key] = len(conditions)
+                    conditions.append((sys.intern(key[0]), sys.intern(key[1].title()), sys.intern(key[2])))
+                condition[i] = code
+
+        except KeyError as e:
+            raise Exception(f"Forecast formatting error: {str(e)}")
+
+        # One row per field so every column is a contiguous slice
+        block = np.array(rows, dtype=np.float64).reshape(n, len(NUMERIC_FIELDS)).T.copy()
+
+        columns = {}
+        for row, name in enumerate(NUMERIC_FIELDS):
+            column = block[row]
+            if name in INT_FIELDS:
+                column = column.astype(INT_FIELDS[name])
+            columns[name] = column
+
+        city = data.get('city', {}) if data else {}
+        meta = {
+            'name': city.get('name', ''),
+            'country': city.get('country', ''),
+            'coord': city.get('coord', {}),
+            'timezone': city.get('timezone', 0)
+        }
+
+        return cls(time, columns, condition, conditions, cities=[meta])
+
+    @classmethod
+    def concat(cls, parts: Sequence['ForecastColumns']) -> 'ForecastColumns':
+        """
+        Concatenate several forecasts into one multi-city block
+
+        Args:
+            parts: Forecast columns to join
+
+        Returns:
+            Columnar forecast covering every city in parts
+        """
+        conditions: List[tuple] = []
+        lookup: Dict[tuple, int] = {}
+        codes = []
+        lengths = []
+        cities = []
+
+        for part in parts:
+            remap = np.empty(max(len(part.conditions), 1), dtype=np.int16)
+            for old, key in enumerate(part.conditions):
+                new = lookup.get(key)
+                if new is None:
+                    new = lookup[key] = len(conditions)
+                    conditions.append(key)
+                remap[old] = new
+            codes.append(remap[part.condition])
+            lengths.extend(np.diff(part.offsets))
+            cities.extend(part.cities)
+
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        columns = {name: np.concatenate([getattr(part, name) for part in parts]) for name in NUMERIC_FIELDS}
+        time = np.concatenate([part.time for part in parts]) if parts else np.empty(0, dtype=np.int64)
+        condition = np.concatenate(codes) if codes else np.empty(0, dtype=np.int16)
+
+        return cls(time, columns, condition, conditions, offsets=offsets, cities=cities)
+
+    @property
+    def city_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def city(self, index: int) -> 'ForecastColumns':
+        """
+        Get one city's rows as array views (no copy)
+
+        Args:
+            index: City position
+
+        Returns:
+            Single-city forecast columns
+        """
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        columns = {name: getattr(self, name)[start:end] for name in NUMERIC_FIELDS}
+        return ForecastColumns(self.time[start:end], columns, self.condition[start:end],
+                               self.conditions, cities=[self.cities[index]])
+
+    def city_ids(self) -> np.ndarray:
+        """Get the city position of every row"""
+        return np.repeat(np.arange(self.city_count), np.diff(self.offsets))
+
+    def to_dataframe(self):
+        """
+        Expose the columns as a pandas DataFrame without copying numeric data
+
+        Returns:
+            DataFrame with a datetime64 'datetime' column (UTC), numeric columns,
+            categorical 'description'/'main'/'icon' and a 'city' position column
+        """
+        import pandas as pd
+
+        frame = {'datetime': self.time.view('datetime64[s]')}
+        for name in NUMERIC_FIELDS:
+            frame[name] = getattr(self, name)
+
+        for position, field in enumerate(('main', 'description', 'icon')):
+            categories = [entry[position] for entry in self.conditions]
+            unique = list(dict.fromkeys(categories))
+            remap = np.array([unique.index(value) for value in categories] or [0], dtype=np.int16)
+            frame[field] = pd.Categorical.from_codes(remap[self.condition] if len(self.condition) else [],
+                                                     categories=unique)
+
+        if self.city_count > 1:
+            frame['city'] = self.city_ids()
+
+        return pd.DataFrame(frame, copy=False)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        """
+        Get row index in the format_forecast_data dictionary layout
+
+        A slice returns a list of row dictionaries, like slicing the list
+        format_forecast_data returns:
+
+        >>> from weather_synthetic import generate_forecast
+        >>> columns = generate_forecast(2, days=1, seed=7).columns
+        >>> rows = columns.as_dicts()
+        >>> columns[:8] == rows[:8] and columns[-3:] == rows[-3:] and columns[::5] == rows[::5]
+        True
+        >>> columns[100:]
+        []
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        main, description, icon = self.conditions[self.condition[index]]
+        return {
+            'datetime': datetime.fromtimestamp(int(self.time[index])),
+            'temperature': {
+                'temp': float(self.temp[index]),
+                'feels_like': float(self.feels_like[index]),
+                'min': float(self.temp_min[index]),
+                'max': float(self.temp_max[index])
+            },
+            'weather': {
+                'main': main,
+                'description': description,
+                'icon': icon
+            },
+            'humidity': int(self.humidity[index]),
+            'pressure': int(self.pressure[index]),
+            'wind': {
+                'speed': float(self.wind_speed[index]),
+                'direction': int(self.wind_direction[index]),
+                'gust': float(self.wind_gust[index])
+            },
+            'visibility': float(self.visibility[index]),
+            'precipitation': float(self.precipitation[index])
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def as_dicts(self) -> List[Dict]:
+        """
+        Materialize every row as a format_forecast_data dictionary
+
+        Returns:
+            List of formatted forecast entries
+        """
+        return list(self)
+
+    def nbytes(self) -> int:
+        """Total bytes held by the numeric arrays"""
+        arrays = [self.time, self.condition, self.offsets] + [getattr(self, name) for name in NUMERIC_FIELDS]
+        return sum(array.nbytes for array in arrays)
+
+
+def _local_offsets(time: np.ndarray) -> np.ndarray:
+    """UTC offsets (seconds) of this machine's local timezone for each timestamp"""
+    if len(time) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    first = localtime(int(time.min())).tm_gmtoff
+    last = localtime(int(time.max())).tm_gmtoff
+    if first == last:
+        return np.full(len(time), first, dtype=np.int64)
+
+    # A DST change falls inside the range, resolve each distinct hour once
+    hours, inverse = np.unique(time // 3600, return_inverse=True)
+    offsets = np.array([localtime(int(hour) * 3600).tm_gmtoff for hour in hours], dtype=np.int64)
+    return offsets[inverse]
+
+
+def local_datetimes(time: np.ndarray) -> np.ndarray:
+    """
+    Convert Unix seconds to naive local wall-clock datetime64 values
+
+    Args:
+        time: int64 Unix seconds
+
+    Returns:
+        datetime64[s] array matching datetime.fromtimestamp for every entry
+    """
+    return (time + _local_offsets(time)).view('datetime64[s]')
+
+
+def aggregate_daily(columns: ForecastColumns, days: int = 5, timezone: str = 'local') -> Dict[str, np.ndarray]:
+    """
+    Aggregate 3-hourly forecasts into daily summaries in one vectorized pass
+
+    Works on a single city or a multi-city ForecastColumns. Each day's
+    representative condition is its middle entry, as in _process_daily_data.
+
+    Args:
+        columns: Forecast columns (rows sorted by city, then time)
+        days: Maximum number of days per city
+        timezone: 'local' to split days in this machine's timezone (like
+                  get_daily_forecast always has) or 'city' for each city's
+                  own UTC offset
+
+    Returns:
+        Dictionary of equal-length arrays: city, date (datetime64[D]),
+        temp_min, temp_max, temp_avg, humidity, wind_speed, precipitation,
+        condition (index into conditions) and count, plus 'conditions'
+    """
+    n = len(columns)
+    single = columns.city_count == 1
+    city = np.zeros(n, dtype=np.int64) if single else columns.city_ids()
+
+    if timezone == 'city':
+        city_offsets = np.array([meta.get('timezone', 0) or 0 for meta in columns.cities], dtype=np.int64)
+        offsets = city_offsets[city]
+    else:
+        offsets = _local_offsets(columns.time)
+
+    day = (columns.time + offsets) // 86400
+
+    if n == 0:
+        empty_float = np.zeros(0, dtype=np.float64)
+        return {
+            'city': np.zeros(0, dtype=np.int64), 'date': np.zeros(0, dtype='datetime64[D]'),
+            'temp_min': empty_float, 'temp_max': empty_float, 'temp_avg': empty_float,
+            'humidity': empty_float, 'wind_speed': empty_float, 'precipitation': empty_float,
+            'condition': np.zeros(0, dtype=np.int16), 'count': np.zeros(0, dtype=np.int64),
+            'conditions': columns.conditions
+        }
+
+    # Rows are grouped by city then time, so each (city, day) is one contiguous run
+    boundary = np.empty(n, dtype=bool)
+    boundary[0] = True
+    np.not_equal(day[1:], day[:-1], out=boundary[1:])
+    if not single:
+        boundary[1:] |= city[1:] != city[:-1]
+    starts = np.flatnonzero(boundary)
+
+    if single:
+        # One city: keep the first `days` groups by cutting the rows after them
+        if len(starts) > days:
+            n = int(starts[days])
+            starts = starts[:days]
+        keep = None
+    else:
+        # Keep the first `days` groups of every city
+        group_city = city[starts]
+        first_group = np.searchsorted(group_city, group_city, side='left')
+        keep = (np.arange(len(starts)) - first_group) < days
+
+    counts = np.empty_like(starts)
+    counts[:-1] = starts[1:] - starts[:-1]
+    counts[-1] = n - starts[-1]
+    temp = columns.temp[:n]
+
+    totals = np.add.reduceat
+    result = {
+        'city': city[starts],
+        'date': day[starts].astype('datetime64[D]'),
+        'temp_min': np.minimum.reduceat(temp, starts),
+        'temp_max': np.maximum.reduceat(temp, starts),
+        'temp_avg': totals(temp, starts) / counts,
+        'humidity': totals(columns.humidity[:n].astype(np.float64), starts) / counts,
+        'wind_speed': totals(columns.wind_speed[:n], starts) / counts,
+        'precipitation': totals(columns.precipitation[:n], starts),
+        'condition': columns.condition[starts + counts // 2],
+        'count': counts
+    }
+
+    if keep is not None:
+        result = {name: values[keep] for name, values in result.items()}
+    result['conditions'] = columns.conditions
+    return result
+
+
+def daily_to_dicts(daily: Dict[str, np.ndarray], city: int = 0) -> List[Dict]:
+    """
+    Convert one city's aggregate_daily output to get_daily_forecast dictionaries
+
+    Args:
+        daily: Result of aggregate_daily
+        city: City position
+
+    Returns:
+        List of daily forecast dictionaries
+    """
+    conditions = daily['conditions']
+    rows = np.flatnonzero(daily['city'] == city)
+    # Plain Python values for the selected rows in one conversion per field
+    fields = {name: daily[name][rows].tolist() for name in
+              ('date', 'temp_min', 'temp_max', 'temp_avg', 'humidity', 'wind_speed', 'precipitation', 'condition')}
+    result = []
+
+    for i in range(len(rows)):
+        main, description, icon = conditions[fields['condition'][i]]
+        result.append({
+            'date': fields['date'][i],
+            'temperature': {
+                'min': fields['temp_min'][i],
+                'max': fields['temp_max'][i],
+                'avg': fields['temp_avg'][i]
+            },
+            'weather': {'main': main, 'description': description, 'icon': icon},
+            'humidity': fields['humidity'][i],
+            'wind_speed': fields['wind_speed'][i],
+            'precipitation': fields['precipitation'][i]
+        })
+
+    return result
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Weather Gazetteer Module
+Offline city index with prefix and typo-tolerant lookups for geocoding
+and autocomplete without API calls
+"""
+
+import csv
+import heapq
+import io
+import os
+import unicodedata
+import zipfile
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+DEFAULT_CITY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cities.csv')
+GEONAMES_URL = "https://download.geonames.org/export/dump"
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a place name for matching
+
+    Args:
+        name: Raw city name
+
+    Returns:
+        Case-folded name without accents and with single spaces
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().replace('-', ' ').split())
+
+
+class CityIndex:
+    """Compact sorted-array city index"""
+
+    def __init__(self, records: Iterable[Tuple[str, str, float, float, int, str]]):
+        """
+        Build an index
+
+        Args:
+            records: Iterable of (name, country, lat, lon, population, state)
+        """
+        rows = []
+        for name, country, lat, lon, population, state in records:
+            key = normalize_name(name)
+            if key:
+                rows.append((key, -int(population or 0), name, country.upper(), float(lat), float(lon), state))
+
+        # Sorted by key, most populous first within equal keys
+        rows.sort()
+
+        self.keys: List[str] = [row[0] for row in rows]
+        self.names: List[str] = [row[2] for row in rows]
+        self.countries: List[str] = [row[3] for row in rows]
+        self.states: List[str] = [row[6] for row in rows]
+        self.lats = array('d', (row[4] for row in rows))
+        self.lons = array('d', (row[5] for row in rows))
+        self.populations = array('q', (-row[1] for row in rows))
+
+        # One-delete neighbourhood, built on first fuzzy lookup
+        self._deletes: Optional[Dict[str, Tuple[int, ...]]] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_CITY_FILE) -> 'CityIndex':
+        """
+        Load an index from a CSV file with name, country, lat, lon, population
+        (and optional state) columns
+
+        Args:
+            path: CSV file path
+
+        Returns:
+            City index
+        """
+        with open(path, newline='', encoding='utf-8') as handle:
+            reader = csv.DictReader(handle)
+            return cls(
+                (row['name'], row['country'], row['lat'], row['lon'],
+                 row.get('population') or 0, row.get('state') or '')
+                for row in reader
+            )
+
+    @classmethod
+    def from_geonames(cls, path: str, min_population: int = 0) -> 'CityIndex':
+        """
+        Load an index from a GeoNames cities dump (e.g. cities15000.txt)
+
+        Args:
+            path: Tab-separated GeoNames file
+            min_population: Skip places smaller than this
+
+        Returns:
+            City index
+        """
+        def records():
+            with open(path, encoding='utf-8') as handle:
+                for line in handle:
+                    fields = line.rstrip('\n').split('\t')
+                    if len(fields) < 15:
+                        continue
+                    population = int(fields[14] or 0)
+                    if population < min_population:
+                        continue
+                    yield fields[1], fields[8], fields[4], fields[5], population, fields[10]
+
+        return cls(records())
+
+    def _record(self, i: int) -> Dict:
+        """Build a geocoding-API shaped result for row i"""
+        record = {
+            'name': self.names[i],
+            'lat': self.lats[i],
+            'lon': self.lons[i],
+            'country': self.countries[i],
+            'population': self.populations[i]
+        }
+        if self.states[i]:
+            record['state'] = self.states[i]
+        return record
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Get the [start, end) row range of keys starting with prefix"""
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\uffff', lo=start)
+        return start, end
+
+    def lookup(self, city: str, country: str = "", limit: int = 1) -> List[Dict]:
+        """
+        Find exact city name matches
+
+        Args:
+            city: City name
+            country: Country code filter (optional)
+            limit: Maximum number of results
+
+        Returns:
+            List of location dictionaries, most populous first
+        """
+        key = normalize_name(city)
+        country = country.strip().upper()
+
+        start = bisect_left(self.keys, key)
+        results = []
+        i = start
+        while i < len(self.keys) and self.keys[i] == key and len(results) < limit:
+            if not country or self.countries[i] == country:
+                results.append(self._record(i))
+            i += 1
+
+        return results
+
+    def suggest(self, text: str, limit: int = 8, fuzzy: bool = True) -> List[Dict]:
+        """
+        Autocomplete a partially typed city name
+
+        Prefix matches come first; when fuzzy is enabled, names one edit
+        away (and prefixes with one extra character) fill the remaining slots.
+
+        Args:
+            text: Typed text, optionally followed by ",<country code>"
+            limit: Maximum number of suggestions
+            fuzzy: Also return typo-tolerant matches
+
+        Returns:
+            List of location dictionaries, most populous first
+        """
+        city, _, country = text.partition(',')
+        key = normalize_name(city)
+        country = country.strip().upper()
+        if not key:
+            return []
+
+        def wanted(i: int) -> bool:
+            return not country or self.countries[i].startswith(country)
+
+        start, end = self._prefix_range(key)
+        rows = [i for i in range(start, end) if wanted(i)]
+        chosen = heapq.nlargest(limit, rows, key=self.populations.__getitem__)
+
+        if fuzzy and len(chosen) < limit and len(key) >= 3:
+            seen = set(chosen)
+            candidates = set()
+
+            for i in self._fuzzy_rows(key):
+                candidates.add(i)
+
+            for variant in self._one_deletes(key):
+                start, end = self._prefix_range(variant)
+                candidates.update(range(start, min(end, start + 4 * limit)))
+
+            extra = [i for i in candidates if i not in seen and wanted(i)]
+            chosen.extend(heapq.nlargest(limit - len(chosen), extra, key=self.populations.__getitem__))
+
+        return [self._record(i) for i in chosen]
+
+    @staticmethod
+    def _one_deletes(key: str) -> List[str]:
+        return [key[:i] + key[i + 1:] for i in range(len(key))]
+
+    def _fuzzy_rows(self, key: str) -> List[int]:
+        """Rows whose full name is within one insert, delete, substitution or transposition"""
+        if self._deletes is None:
+            deletes: Dict[str, List[int]] = {}
+            for i, name in enumerate(self.keys):
+                for variant in set(self._one_deletes(name)) | {name}:
+                    deletes.setdefault(variant, []).append(i)
+            self._deletes = {variant: tuple(rows) for variant, rows in deletes.items()}
+
+        rows = set()
+        for variant in set(self._one_deletes(key)) | {key}:
+            rows.update(self._deletes.get(variant, ()))
+        return list(rows)
+
+
+@lru_cache(maxsize=1)
+def load_default_index() -> CityIndex:
+    """
+    Load the process-wide default index
+
+    Uses the GeoNames file named by WEATHER_CITY_INDEX if set, otherwise
+    the bundled data/cities.csv.
+
+    Returns:
+        City index
+    """
+    path = os.getenv('WEATHER_CITY_INDEX')
+    if path and os.path.exists(path):
+        if path.endswith('.csv'):
+            return CityIndex.from_csv(path)
+        return CityIndex.from_geonames(path)
+    return CityIndex.from_csv(DEFAULT_CITY_FILE)
+
+
+def download_geonames(dest_dir: str, dataset: str = "cities15000") -> str:
+    """
+    Download and unpack a GeoNames cities dump
+
+    Args:
+        dest_dir: Directory to write the .txt file to
+        dataset: GeoNames dataset name (cities500, cities1000, cities5000, cities15000)
+
+    Returns:
+        Path of the extracted file
+    """
+    import requests
+
+    response = requests.get(f"{GEONAMES_URL}/{dataset}.zip", timeout=60)
+    response.raise_for_status()
+
+    os.makedirs(dest_dir, exist_ok=True)
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        archive.extract(f"{dataset}.txt", dest_dir)
+
+    return os.path.join(dest_dir, f"{dataset}.txt")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Weather Icons Module
+On-disk store of decoded, pre-resized OpenWeatherMap icons so the UIs
+never download or resize an icon on their main thread
+"""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
+
+from weather_cache import SingleFlight
+from weather_transport import WeatherTransport
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+ICON_URL = "https://openweathermap.org/img/wn"
+
+# The full OpenWeatherMap icon set: day and night variants of nine conditions
+ICON_CODES = tuple(f"{condition}{variant}"
+                   for condition in ('01', '02', '03', '04', '09', '10', '11', '13', '50')
+                   for variant in ('d', 'n'))
+
+DEFAULT_ICON_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'weather-app', 'icons')
+
+
+class IconStore:
+    """Thread-safe disk cache of icons, already resized for display"""
+
+    def __init__(self, directory: Optional[str] = None, size: Tuple[int, int] = (80, 80),
+                 transport: Optional[WeatherTransport] = None, icon_url: str = ICON_URL):
+        """
+        Args:
+            directory: Where resized PNGs are kept (defaults to env
+                       WEATHER_ICON_DIR, then ~/.cache/weather-app/icons)
+            size: Display size in pixels
+            transport: HTTP transport for downloads (a small pool by default)
+            icon_url: Base URL of the icon images
+        """
+        self.directory = os.path.expanduser(directory or os.getenv('WEATHER_ICON_DIR') or DEFAULT_ICON_DIR)
+        self.size = size
+        self.transport = transport or WeatherTransport(pool_size=4)
+        self.icon_url = icon_url
+        self.single_flight = SingleFlight()
+
+    def path(self, icon_code: str) -> str:
+        """Disk location of an icon at this store's size"""
+        width, height = self.size
+        return os.path.join(self.directory, f"{icon_code}_{width}x{height}.png")
+
+    def load(self, icon_code: str) -> 'Image.Image':
+        """
+        Get a decoded icon, from disk or downloaded and resized on a miss
+
+        Blocks on I/O; call it from a worker thread, never the UI thread.
+
+        Args:
+            icon_code: OpenWeatherMap icon code, e.g. "10d"
+
+        Returns:
+            RGBA image at the store's size
+        """
+        return self.single_flight.do(icon_code, self._load, icon_code)
+
+    def _load(self, icon_code: str) -> 'Image.Image':
+        # PIL is imported here, on a worker thread, so it never delays the first window
+        from PIL import Image
+
+        path = self.path(icon_code)
+        if os.path.exists(path):
+            try:
+                with Image.open(path) as image:
+                    return image.convert('RGBA')
+            except OSError:
+                pass  # Truncated or corrupt file, fetch it again
+
+        response = self.transport.get(f"{self.icon_url}/{icon_code}@2x.png")
+        if response.status_code != 200:
+            raise Exception(f"Icon {icon_code} not available (HTTP {response.status_code})")
+
+        with Image.open(BytesIO(response.content)) as image:
+            resized = image.convert('RGBA').resize(self.size, Image.Resampling.LANCZOS)
+
+        # Write to a temp file and rename, so readers never see a partial PNG
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                resized.save(f, format='PNG')
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return resized
+
+    def prewarm(self, icon_codes=ICON_CODES, max_workers: int = 6) -> Iterator[Tuple[str, Optional['Image.Image']]]:
+        """
+        Load a set of icons in parallel
+
+        Args:
+            icon_codes: Codes to load (the full OpenWeatherMap set by default)
+            max_workers: Maximum concurrent loads
+
+        Yields:
+            (icon_code, image) pairs in order; image is None if it failed
+        """
+        def load(icon_code):
+            try:
+                return self.load(icon_code)
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from zip(icon_codes, executor.map(load, icon_codes))
+
+    def close(self):
+        """Close the HTTP transport"""
+        self.transport.close()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Weather Metrics Module
+Per-endpoint client metrics with Prometheus text exposition
+"""
+
+import atexit
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence, Tuple
+
+
+# Upstream call latency buckets in seconds (retries and backoff included)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Rate limiter wait buckets in seconds
+WAIT_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+
+def status_class(status: int) -> str:
+    """Error class of a non-200 HTTP status"""
+    if status in (401, 403):
+        return 'auth'
+    if status == 404:
+        return 'not_found'
+    if status == 429:
+        return 'rate_limited'
+    if status >= 500:
+        return 'server'
+    return 'client'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], lock: threading.Lock):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple, float] = {}
+        self._lock = lock
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], lock: threading.Lock,
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[Tuple, list] = {}
+        self._lock = lock
+
+    def observe(self, labels: Tuple, value: float):
+        # Counts per bucket (the last one is +Inf), then sum
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def samples(self):
+        for labels, entry in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), entry[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(entry[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named metrics of one process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self._server = None
+        self._writer = None
+
+    def _get(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, threading.Lock(), **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._get(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Get or create a histogram"""
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            Exposition text
+        """
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            with metric._lock:
+                samples = list(metric.samples())
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """
+        Write the exposition text to a file atomically (for a node_exporter
+        textfile collector or a sidecar)
+
+        Args:
+            path: Destination file
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'w') as f:
+            f.write(self.render())
+        os.replace(temp, path)
+
+    def write_periodically(self, path: str, interval: float = 15.0):
+        """
+        Rewrite the metrics file every interval seconds and at exit
+
+        Args:
+            path: Destination file
+            interval: Seconds between writes
+        """
+        if self._writer is not None:
+            return
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.write(path)
+
+        def final():
+            stop.set()
+            self.write(path)
+
+        self.write(path)
+        self._writer = threading.Thread(target=loop, name="weather-metrics-writer", daemon=True)
+        self._writer.start()
+        atexit.register(final)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve the metrics over HTTP (any path, e.g. /metrics) in a daemon thread
+
+        Args:
+            port: Port to bind
+            host: Interface to bind (loopback by default; "0.0.0.0" exposes
+                the metrics on every interface)
+
+        Returns:
+            The running server
+        """
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                payload = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            raise Exception(f"Metrics port {port} unavailable: {str(e)}")
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="weather-metrics", daemon=True).start()
+        return self._server
+
+
+class ClientMetrics:
+    """
+    The metrics WeatherAPI and AsyncWeatherAPI record, per endpoint
+
+    Clients hold None instead of an instance when metrics are disabled, so
+    the disabled cost is one attribute check per call.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        """
+        Args:
+            registry: Registry to record into (defaults to the process registry)
+        """
+        self.registry = registry = registry if registry is not None else REGISTRY
+        self.requests = registry.counter(
+            'weather_api_requests_total', "Upstream API calls", ('endpoint',))
+        self.errors = registry.counter(
+            'weather_api_errors_total', "Failed upstream API calls by error class", ('endpoint', 'error'))
+        self.retries = registry.counter(
+            'weather_api_retries_total', "Extra upstream attempts made by retries", ('endpoint',))
+        self.latency = registry.histogram(
+            'weather_api_request_duration_seconds', "Upstream call latency, retries included", ('endpoint',))
+        self.bytes = registry.counter(
+            'weather_api_response_bytes_total', "Response body bytes received, retried attempts included", ('endpoint',))
+        self.cache = registry.counter(
+            'weather_api_cache_requests_total', "Endpoint calls by cache result (hit, miss, stale, refresh, bypass)",
+            ('endpoint', 'result'))
+        self.waits = registry.histogram(
+            'weather_api_rate_limit_wait_seconds', "Time spent waiting for the client-side rate limiter",
+            ('endpoint',), buckets=WAIT_BUCKETS)
+
+    def record_request(self, endpoint: str, seconds: float, size: int = 0,
+                       error: Optional[str] = None, retries: int = 0):
+        """
+        Record one upstream call
+
+        Args:
+            endpoint: Endpoint name ('weather', 'forecast', ...)
+            seconds: Duration including retries
+            size: Response body bytes of every attempt
+            error: Error class, None on success
+            retries: Extra attempts made
+        """
+        labels = (endpoint,)
+        self.requests.inc(labels)
+        self.latency.observe(labels, seconds)
+        if size:
+            self.bytes.inc(labels, size)
+        if retries:
+            self.retries.inc(labels, retries)
+        if error is not None:
+            self.errors.inc((endpoint, error))
+
+    def record_cache(self, endpoint: str, result: str):
+        """Record an endpoint call's cache result"""
+        self.cache.inc((endpoint, result))
+
+    def record_wait(self, endpoint: str, seconds: float):
+        """Record time spent in the rate limiter before an upstream call"""
+        self.waits.observe((endpoint,), seconds)
+
+
+# Registry shared by every client of this process
+REGISTRY = MetricsRegistry()
+
+_default_lock = threading.Lock()
+_default: Optional[ClientMetrics] = None
+_default_resolved = False
+
+
+def default_metrics() -> Optional[ClientMetrics]:
+    """
+    Client metrics for this process, when the environment asks for them
+
+    WEATHER_METRICS_PORT serves them over HTTP on WEATHER_METRICS_HOST
+    (default 127.0.0.1); WEATHER_METRICS_FILE rewrites a file every
+    WEATHER_METRICS_INTERVAL seconds (default 15).
+    Exposition starts once, with the first client. Metrics are optional:
+    an exposition that fails to start (e.g. the port is taken by another
+    process sharing the .env) is logged and skipped, never raised.
+
+    Returns:
+        Shared ClientMetrics, or None when no exposition is configured or
+        none could start
+    """
+    global _default, _default_resolved
+    with _default_lock:
+        if not _default_resolved:
+            _default_resolved = True
+            port = os.getenv('WEATHER_METRICS_PORT')
+            path = os.getenv('WEATHER_METRICS_FILE')
+
+            started = False
+            if port:
+                try:
+                    REGISTRY.serve(int(port), os.getenv('WEATHER_METRICS_HOST', '127.0.0.1'))
+                    started = True
+                except Exception as e:
+                    logger.warning("Metrics not served: %s", e)
+            if path:
+                try:
+                    REGISTRY.write_periodically(path, float(os.getenv('WEATHER_METRICS_INTERVAL', 15)))
+                    started = True
+                except Exception as e:
+                    logger.warning("Metrics file not written: %s", e)
+
+            if started:
+                _default = ClientMetrics(REGISTRY)
+        return _default
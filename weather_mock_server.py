@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Weather Mock Server Module
+Local stand-in for the OpenWeatherMap endpoints WeatherAPI uses, with
+record/replay and latency, error and 429 injection for offline tests
+and benchmarks
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from weather_gazetteer import CityIndex, load_default_index
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+UPSTREAM_URL = "https://api.openweathermap.org"
+
+ENDPOINTS = {
+    '/data/2.5/weather': 'weather',
+    '/data/2.5/forecast': 'forecast',
+    '/data/2.5/air_pollution': 'air_pollution',
+    '/geo/1.0/direct': 'geocode'
+}
+
+
+class MockOpenWeatherServer:
+    """
+    Threaded HTTP server answering like api.openweathermap.org
+
+    Responses come from, in order: recorded files (replay_dir), the real
+    API (record_dir, saving what it returns), or payloads synthesized
+    for the requested city: the recorded London fixtures re-targeted, or
+    with synthetic=True varied weather from weather_synthetic.
+    Point WeatherAPI at it with WeatherAPI(api_root=server.url) or
+    OPENWEATHER_API_ROOT.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: Optional[int] = None,
+                 replay_dir: Optional[str] = None, record_dir: Optional[str] = None,
+                 upstream_url: str = UPSTREAM_URL,
+                 city_index: Optional[CityIndex] = None, seed: Optional[int] = None,
+                 synthetic: bool = False):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            latency: Seconds added to every response
+            jitter: Extra uniformly random seconds (0 - jitter) per response
+            error_rate: Fraction of requests answered with a 500
+            rate_limit_rate: Fraction of requests answered with a 429
+            retry_after: Retry-After header (seconds) sent with 429s
+            replay_dir: Serve responses recorded in this directory
+            record_dir: Forward unrecorded requests upstream and save the answers here
+            upstream_url: Real API root used when recording
+            city_index: Gazetteer for synthesized responses
+            seed: Seed for the fault-injection random draws (and synthetic weather)
+            synthetic: Generate weather per city with weather_synthetic (needs numpy)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.replay_dir = replay_dir
+        self.record_dir = record_dir
+        self.upstream_url = upstream_url
+        self.city_index = city_index or load_default_index()
+        self.random = random.Random(seed)
+        self.seed = seed or 0
+        self.synthetic = synthetic
+
+        with open(os.path.join(FIXTURE_DIR, 'weather_london.json')) as f:
+            self.weather_fixture = json.load(f)
+        with open(os.path.join(FIXTURE_DIR, 'forecast_london.json')) as f:
+            self.forecast_fixture = json.load(f)
+
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.statuses: Dict[int, int] = {}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Root URL to use in place of https://api.openweathermap.org"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockOpenWeatherServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-openweather", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stats(self) -> Dict:
+        """
+        Get request counters
+
+        Returns:
+            Dictionary with requests per endpoint and responses per status code
+        """
+        with self._lock:
+            return {'requests': dict(self.requests), 'statuses': dict(self.statuses)}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, body, headers = server.respond(self.path)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def respond(self, path: str) -> Tuple[int, object, Dict[str, str]]:
+        """
+        Build the response for a request path
+
+        Args:
+            path: Request path with query string
+
+        Returns:
+            Tuple of (status code, JSON body, extra headers)
+        """
+        parts = urlsplit(path)
+        endpoint = ENDPOINTS.get(parts.path)
+        params = dict(parse_qsl(parts.query))
+
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        status, body, headers = self._respond(endpoint, parts.path, params)
+
+        with self._lock:
+            self.requests[endpoint or parts.path] = self.requests.get(endpoint or parts.path, 0) + 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+        return status, body, headers
+
+    def _respond(self, endpoint: Optional[str], path: str, params: Dict) -> Tuple[int, object, Dict[str, str]]:
+        if endpoint is None:
+            return 404, {'cod': '404', 'message': 'Internal error'}, {}
+        if not params.get('appid'):
+            return 401, {'cod': 401, 'message': 'Invalid API key. Please see '
+                                                'https://openweathermap.org/faq#error401 for more info.'}, {}
+
+        draw = self.random.random()
+        if draw < self.rate_limit_rate:
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else {}
+            return 429, {'cod': 429, 'message': 'Your account is temporary blocked due to exceeding of '
+                                                'requests limitation of your subscription type.'}, headers
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 500, {'cod': 500, 'message': 'Internal server error'}, {}
+
+        if self.replay_dir:
+            recorded = self._read_recording(self.replay_dir, endpoint, params)
+            if recorded is not None:
+                return recorded[0], recorded[1], {}
+
+        if self.record_dir:
+            response = requests.get(f"{self.upstream_url}{path}", params=params, timeout=30)
+            body = response.json()
+            self._write_recording(endpoint, params, response.status_code, body)
+            return response.status_code, body, {}
+
+        return self._synthesize(endpoint, params)
+
+    @staticmethod
+    def recording_name(endpoint: str, params: Dict) -> str:
+        """File name of a recorded response (the API key is not part of it)"""
+        query = urlencode(sorted((key, value.lower()) for key, value in params.items() if key != 'appid'))
+        return f"{endpoint}-{hashlib.sha1(query.encode()).hexdigest()[:16]}.json"
+
+    def _read_recording(self, directory: str, endpoint: str, params: Dict):
+        path = os.path.join(directory, self.recording_name(endpoint, params))
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            recording = json.load(f)
+        return recording['status'], recording['body']
+
+    def _write_recording(self, endpoint: str, params: Dict, status: int, body):
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = os.path.join(self.record_dir, self.recording_name(endpoint, params))
+        query = {key: value for key, value in params.items() if key != 'appid'}
+        with open(path, 'w') as f:
+            json.dump({'endpoint': endpoint, 'params': query, 'status': status, 'body': body}, f, indent=2)
+
+    def _place(self, params: Dict) -> Optional[Dict]:
+        """Gazetteer record for a q= or lat/lon request"""
+        if 'q' in params:
+            city, _, country = params['q'].partition(',')
+            matches = self.city_index.lookup(city, country)
+            return matches[0] if matches else None
+
+        try:
+            lat, lon = float(params['lat']), float(params['lon'])
+        except (KeyError, ValueError):
+            return None
+        return {'name': f"{lat:.2f},{lon:.2f}", 'country': '', 'lat': lat, 'lon': lon, 'population': 0}
+
+    def _synthesize(self, endpoint: str, params: Dict) -> Tuple[int, object, Dict[str, str]]:
+        if endpoint == 'geocode':
+            city, _, country = params.get('q', '').partition(',')
+            limit = int(params.get('limit', 5))
+            return 200, [{'name': match['name'], 'lat': match['lat'], 'lon': match['lon'], 'country': match['country']}
+                         for match in self.city_index.lookup(city, country, limit)], {}
+
+        place = self._place(params)
+        if place is None:
+            return 404, {'cod': '404', 'message': 'city not found'}, {}
+
+        if endpoint == 'air_pollution':
+            return 200, self._air_pollution(place), {}
+        if self.synthetic:
+            return 200, self._generated(endpoint, place), {}
+        if endpoint == 'forecast':
+            return 200, self._forecast(place), {}
+        return 200, self._weather(place), {}
+
+    @staticmethod
+    def _shift(place: Dict) -> float:
+        """Temperature offset from London's for a place, by latitude"""
+        return round((abs(51.5) - abs(place['lat'])) * 0.4, 2)
+
+    def _shift_main(self, main: Dict, shift: float) -> Dict:
+        main = dict(main)
+        for key in ('temp', 'feels_like', 'temp_min', 'temp_max'):
+            main[key] = round(main[key] + shift, 2)
+        return main
+
+    def _weather(self, place: Dict) -> Dict:
+        now = int(time.time())
+        data = dict(self.weather_fixture)
+        data.update(name=place['name'], dt=now, coord={'lat': place['lat'], 'lon': place['lon']},
+                    main=self._shift_main(data['main'], self._shift(place)),
+                    sys=dict(data['sys'], country=place['country']))
+        return data
+
+    def _forecast(self, place: Dict) -> Dict:
+        # Move the recorded steps so the first one is the next 3-hour boundary
+        first = self.forecast_fixture['list'][0]['dt']
+        offset = (int(time.time()) // 10800 + 1) * 10800 - first
+        shift = self._shift(place)
+
+        steps = []
+        for step in self.forecast_fixture['list']:
+            dt = step['dt'] + offset
+            steps.append(dict(step, dt=dt, main=self._shift_main(step['main'], shift),
+                              dt_txt=datetime.fromtimestamp(dt, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')))
+
+        data = dict(self.forecast_fixture, list=steps)
+        data['city'] = dict(data['city'], name=place['name'], country=place['country'],
+                            coord={'lat': place['lat'], 'lon': place['lon']})
+        return data
+
+    def _generated(self, endpoint: str, place: Dict) -> Dict:
+        from weather_synthetic import STEP, generate_forecast
+
+        # Seeded per place and 3-hour step, so repeated calls agree
+        step = int(time.time()) // STEP * STEP
+        seed = (self.seed, int(hashlib.sha1(f"{place['lat']:.2f},{place['lon']:.2f}".encode()).hexdigest()[:8], 16), step)
+        if endpoint == 'forecast':
+            return generate_forecast([place], seed=seed, start=step + STEP).payload(0)
+        return generate_forecast([place], days=1, seed=seed, start=step).weather_payload(0)
+
+    @staticmethod
+    def _air_pollution(place: Dict) -> Dict:
+        # Stable per place, so repeated calls agree
+        seed = int(hashlib.sha1(f"{place['lat']:.2f},{place['lon']:.2f}".encode()).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        aqi = rng.randint(1, 5)
+        components = {key: round(rng.uniform(low, high) * aqi, 2) for key, low, high in (
+            ('co', 150, 300), ('no', 0, 2), ('no2', 3, 12), ('o3', 15, 30),
+            ('so2', 0.5, 3), ('pm2_5', 2, 8), ('pm10', 3, 12), ('nh3', 0.2, 2))}
+        return {'coord': {'lon': place['lon'], 'lat': place['lat']},
+                'list': [{'main': {'aqi': aqi}, 'components': components, 'dt': int(time.time())}]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenWeatherMap stand-in server")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random seconds per response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument('--retry-after', type=int, help="Retry-After seconds sent with 429s")
+    parser.add_argument('--replay', help="directory of recorded responses to serve")
+    parser.add_argument('--record', help="proxy to the real API and record responses here")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--synthetic', action='store_true', help="generate varied weather per city")
+    args = parser.parse_args()
+
+    server = MockOpenWeatherServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                                   error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                   retry_after=args.retry_after, replay_dir=args.replay,
+                                   record_dir=args.record, seed=args.seed, synthetic=args.synthetic)
+    print(f"Serving OpenWeatherMap stand-in on {server.url}")
+    print(f"Use it with: OPENWEATHER_API_ROOT={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
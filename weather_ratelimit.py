@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Weather Rate Limit Module
+Client-side, quota-aware token-bucket limiter with request priorities
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+# Request priorities, lower runs first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+# Priority of requests made in the current context (thread, task or copied context)
+request_priority: ContextVar[int] = ContextVar('request_priority', default=INTERACTIVE)
+
+# User-facing error for an upstream 429 and for an interactive call whose
+# limiter wait timed out
+RATE_LIMITED_MESSAGE = "Rate limit reached, please try again in a moment"
+
+
+@contextmanager
+def priority(level: int):
+    """
+    Run the enclosed requests at the given priority
+
+    Example:
+        with priority(BACKGROUND):
+            api.get_forecast("London")
+    """
+    token = request_priority.set(level)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucket:
+    """Continuously refilling token bucket"""
+
+    def __init__(self, capacity: float, period: float):
+        """
+        Args:
+            capacity: Tokens available per period (and maximum burst)
+            period: Refill period in seconds
+        """
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available"""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _QuotaState:
+    """Shared bucket, queue and metrics bookkeeping for both limiter flavours"""
+
+    def __init__(self, per_minute: Optional[int] = 60, per_day: Optional[int] = None):
+        """
+        Args:
+            per_minute: Calls allowed per minute (None for no minute limit)
+            per_day: Calls allowed per day (None for no daily limit)
+        """
+        self.per_minute = per_minute
+        self.per_day = per_day
+
+        self.buckets = []
+        if per_minute:
+            self.buckets.append(TokenBucket(per_minute, 60))
+        if per_day:
+            self.buckets.append(TokenBucket(per_day, 24 * 60 * 60))
+
+        self._queue = []
+        self._sequence = itertools.count()
+
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.acquired_by_priority: Dict[int, int] = {}
+
+    def _try_take(self, now: float) -> float:
+        """Take a token from every bucket, or return seconds to wait"""
+        for bucket in self.buckets:
+            bucket.refill(now)
+
+        wait = max((bucket.wait_time() for bucket in self.buckets), default=0.0)
+        if wait > 0:
+            return wait
+
+        for bucket in self.buckets:
+            bucket.tokens -= 1
+        return 0.0
+
+    def _record(self, level: int, started: float, now: float):
+        waited = now - started
+        self.acquired += 1
+        self.acquired_by_priority[level] = self.acquired_by_priority.get(level, 0) + 1
+        if waited > 0.001:
+            self.waited += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def _stats(self) -> Dict:
+        now = time.monotonic()
+        for bucket in self.buckets:
+            bucket.refill(now)
+
+        return {
+            'remaining_minute': int(self.buckets[0].tokens) if self.per_minute else None,
+            'remaining_day': int(self.buckets[-1].tokens) if self.per_day else None,
+            'queue_depth': len(self._queue),
+            'acquired': self.acquired,
+            'acquired_by_priority': dict(self.acquired_by_priority),
+            'waited': self.waited,
+            'timeouts': self.timeouts,
+            'total_wait': self.total_wait,
+            'avg_wait': self.total_wait / self.waited if self.waited else 0.0,
+            'max_wait': self.max_wait
+        }
+
+
+class RateLimiter(_QuotaState):
+    """Thread-safe limiter; queued callers are served in priority order"""
+
+    def __init__(self, per_minute: Optional[int] = 60, per_day: Optional[int] = None):
+        super().__init__(per_minute, per_day)
+        self._condition = threading.Condition()
+
+    def acquire(self, level: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Block until a call may be made
+
+        Args:
+            level: Priority (defaults to the current context's priority)
+            timeout: Maximum seconds to wait
+
+        Raises:
+            Exception: If the wait exceeds the timeout
+        """
+        level = request_priority.get() if level is None else level
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+
+        with self._condition:
+            entry = (level, next(self._sequence))
+            heapq.heappush(self._queue, entry)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+
+                    if self._queue[0] == entry:
+                        wait = self._try_take(now)
+                        if wait == 0:
+                            heapq.heappop(self._queue)
+                            self._record(level, started, now)
+                            self._condition.notify_all()
+                            return
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise Exception(f"Rate limit wait exceeded {timeout}s")
+                        wait = remaining if wait is None else min(wait, remaining)
+
+                    self._condition.wait(wait)
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._condition.notify_all()
+                raise
+
+    def stats(self) -> Dict:
+        """
+        Get remaining budget, queue depth and wait-time metrics
+
+        Returns:
+            Dictionary of limiter metrics
+        """
+        with self._condition:
+            return self._stats()
+
+
+class AsyncRateLimiter(_QuotaState):
+    """asyncio limiter; queued coroutines are served in priority order"""
+
+    def __init__(self, per_minute: Optional[int] = 60, per_day: Optional[int] = None):
+        super().__init__(per_minute, per_day)
+        self._wakeups: Dict[tuple, asyncio.Event] = {}
+
+    def _wake_head(self):
+        if self._queue:
+            self._wakeups[self._queue[0]].set()
+
+    async def acquire(self, level: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Wait until a call may be made
+
+        Args:
+            level: Priority (defaults to the current context's priority)
+            timeout: Maximum seconds to wait
+
+        Raises:
+            Exception: If the wait exceeds the timeout
+        """
+        level = request_priority.get() if level is None else level
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+
+        entry = (level, next(self._sequence))
+        wakeup = self._wakeups[entry] = asyncio.Event()
+        heapq.heappush(self._queue, entry)
+
+        try:
+            while True:
+                now = time.monotonic()
+                wait = None
+
+                if self._queue[0] == entry:
+                    wait = self._try_take(now)
+                    if wait == 0:
+                        heapq.heappop(self._queue)
+                        self._record(level, started, now)
+                        return
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise Exception(f"Rate limit wait exceeded {timeout}s")
+                    wait = remaining if wait is None else min(wait, remaining)
+
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            del self._wakeups[entry]
+            self._wake_head()
+
+    def stats(self) -> Dict:
+        """
+        Get remaining budget, queue depth and wait-time metrics
+
+        Returns:
+            Dictionary of limiter metrics
+        """
+        return self._stats()
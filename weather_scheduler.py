@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Weather Scheduler Module
+Jittered background refresh schedule for pinned cities
+"""
+
+import heapq
+import itertools
+import os
+import random
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from weather_api import WeatherAPI
+from weather_ratelimit import TokenBucket
+
+
+class RefreshScheduler:
+    """
+    Refresh schedule with one cadence per endpoint
+
+    Each pinned key is refreshed once per endpoint interval (the endpoint's
+    cache TTL by default, i.e. how often OpenWeatherMap updates it), with
+    random jitter so refreshes drift apart instead of firing together.
+    When the pins would need more than the call budget, every interval is
+    stretched to fit it, and a token bucket smooths out bursts such as
+    many cities pinned at once.
+
+    Callers should fetch due refreshes past the response cache (e.g.
+    WeatherAPI.get_current_weather(..., fresh=True)); with intervals equal
+    to the TTLs a cached entry would otherwise still be fresh or stale.
+    """
+
+    def __init__(self, intervals: Optional[Dict[str, float]] = None, jitter: float = 0.1,
+                 calls_per_minute: Optional[int] = None, clock=time.monotonic):
+        """
+        Args:
+            intervals: Seconds between refreshes per endpoint (defaults to the
+                       'weather' and 'forecast' cache TTLs)
+            jitter: Relative random spread applied to every interval
+            calls_per_minute: Budget for background refreshes (defaults to
+                              half of env OPENWEATHER_CALLS_PER_MINUTE, 0 for none)
+            clock: Monotonic time source
+        """
+        if intervals is None:
+            intervals = {endpoint: WeatherAPI.CACHE_TTLS[endpoint] for endpoint in ('weather', 'forecast')}
+        if calls_per_minute is None:
+            calls_per_minute = int(os.getenv('OPENWEATHER_CALLS_PER_MINUTE', '60')) // 2
+
+        self.intervals = intervals
+        self.jitter = jitter
+        self.calls_per_minute = calls_per_minute
+        self.clock = clock
+        self.bucket = TokenBucket(calls_per_minute, 60) if calls_per_minute else None
+
+        self._heap: List[Tuple[float, int, Hashable, str, int]] = []
+        self._sequence = itertools.count()
+        self._pinned: Dict[Hashable, int] = {}
+
+        self.refreshes = 0
+        self.deferred = 0
+
+    @property
+    def pinned(self) -> List[Hashable]:
+        """Pinned keys in the order they were pinned"""
+        return list(self._pinned)
+
+    def pin(self, key: Hashable, refresh_now: bool = True):
+        """
+        Start refreshing a key on every endpoint
+
+        Args:
+            key: What to refresh, e.g. "London,GB"
+            refresh_now: Make the first refresh due immediately; otherwise
+                         it lands at a random point within one interval
+        """
+        if key in self._pinned:
+            return
+
+        generation = self._pinned[key] = next(self._sequence)
+        now = self.clock()
+        for endpoint, interval in self.intervals.items():
+            due = now if refresh_now else now + random.uniform(0, interval)
+            heapq.heappush(self._heap, (due, next(self._sequence), key, endpoint, generation))
+
+    def unpin(self, key: Hashable):
+        """Stop refreshing a key (its queued entries are dropped lazily)"""
+        self._pinned.pop(key, None)
+
+    def interval(self, endpoint: str) -> float:
+        """
+        Current seconds between refreshes of one endpoint
+
+        Returns:
+            The endpoint's interval, stretched if the pins exceed the budget
+        """
+        interval = self.intervals[endpoint]
+        if not self.calls_per_minute or not self._pinned:
+            return interval
+
+        calls_per_minute = len(self._pinned) * sum(60 / value for value in self.intervals.values())
+        return interval * max(1.0, calls_per_minute / self.calls_per_minute)
+
+    def due(self) -> List[Tuple[Hashable, str]]:
+        """
+        Pop every refresh that is due and reschedule it
+
+        Refreshes beyond the call budget stay queued for a later call.
+
+        Returns:
+            List of (key, endpoint) pairs to refresh now
+        """
+        now = self.clock()
+        if self.bucket is not None:
+            self.bucket.refill(now)
+
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, endpoint, generation = self._heap[0]
+            if self._pinned.get(key) != generation:
+                heapq.heappop(self._heap)
+                continue
+
+            if self.bucket is not None:
+                if self.bucket.tokens < 1:
+                    self.deferred += 1
+                    break
+                self.bucket.tokens -= 1
+
+            heapq.heappop(self._heap)
+            spread = random.uniform(1 - self.jitter, 1 + self.jitter)
+            heapq.heappush(self._heap, (now + self.interval(endpoint) * spread, next(self._sequence),
+                                        key, endpoint, generation))
+            ready.append((key, endpoint))
+
+        self.refreshes += len(ready)
+        return ready
+
+    def stats(self) -> Dict:
+        """
+        Get schedule metrics
+
+        Returns:
+            Dictionary with pinned count, refreshes issued, times the budget
+            deferred a refresh, and the current interval per endpoint
+        """
+        return {
+            'pinned': len(self._pinned),
+            'refreshes': self.refreshes,
+            'deferred': self.deferred,
+            'intervals': {endpoint: self.interval(endpoint) for endpoint in self.intervals}
+        }
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Weather Synthetic Module
+Seedable, vectorized generator of realistic forecasts for many cities
+"""
+
+import time as _time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from weather_columns import NUMERIC_FIELDS, INT_FIELDS, ForecastColumns
+
+
+STEP = 10800  # 3-hour forecast steps, as the API returns
+STEPS_PER_DAY = 86400 // STEP
+
+# (id, main, description, icon) per weather category, in category order
+CATEGORIES = (
+    (800, 'Clear', 'clear sky', '01'),
+    (801, 'Clouds', 'few clouds', '02'),
+    (802, 'Clouds', 'scattered clouds', '03'),
+    (803, 'Clouds', 'broken clouds', '04'),
+    (804, 'Clouds', 'overcast clouds', '04'),
+    (500, 'Rain', 'light rain', '10'),
+    (501, 'Rain', 'moderate rain', '10'),
+    (502, 'Rain', 'heavy intensity rain', '10'),
+    (211, 'Thunderstorm', 'thunderstorm', '11'),
+    (600, 'Snow', 'light snow', '13'),
+    (601, 'Snow', 'snow', '13'),
+    (741, 'Fog', 'fog', '50')
+)
+
+# Condition code = category * 2 + night, matching ForecastColumns.conditions
+CONDITIONS = [(main, description.title(), icon + pod)
+              for _, main, description, icon in CATEGORIES for pod in ('d', 'n')]
+
+
+def default_places(count: int) -> List[Dict]:
+    """
+    Pick places from the offline gazetteer, most populous first
+
+    Past the end of the gazetteer the places repeat with a numbered name
+    and slightly moved coordinates.
+
+    Args:
+        count: Number of places
+
+    Returns:
+        List of dictionaries with name, country, lat and lon
+    """
+    from weather_gazetteer import load_default_index
+
+    index = load_default_index()
+    order = sorted(range(len(index)), key=lambda i: -index.populations[i])
+    places = []
+    for i in range(count):
+        row, lap = order[i % len(order)], i // len(order)
+        places.append({
+            'name': f"{index.names[row]} {lap}" if lap else index.names[row],
+            'country': index.countries[row],
+            'lat': round(max(-89.0, min(89.0, index.lats[row] + lap * 0.07)), 4),
+            'lon': round((index.lons[row] + lap * 0.11 + 180) % 360 - 180, 4)
+        })
+    return places
+
+
+def _round(values: np.ndarray, digits: int = 1) -> np.ndarray:
+    """np.round with ties settled by round(), as the formatters round"""
+    rounded = np.round(values, digits)
+    scaled = values * 10 ** digits
+    ties = np.flatnonzero(scaled - np.floor(scaled) == 0.5)
+    if len(ties):
+        rounded.reshape(-1)[ties] = [round(value, digits) for value in values.reshape(-1)[ties].tolist()]
+    return rounded
+
+
+def _next_step(now: float) -> int:
+    """The next 3-hour boundary after now"""
+    return (int(now) // STEP + 1) * STEP
+
+
+class SyntheticForecast:
+    """
+    Generated 3-hourly weather for N cities over M days
+
+    Every field is an (N, M * 8) array. ``columns`` holds the same data as
+    a ForecastColumns, as format_forecast_data(..., columnar=True) would
+    return it; payload() and weather_payload() build API-shaped responses.
+    """
+
+    def __init__(self, places: Sequence[Dict], time: np.ndarray, fields: Dict[str, np.ndarray]):
+        """
+        Args:
+            places: Place dictionaries (name, country, lat, lon) per city
+            time: Step times as int64 Unix seconds, shared by every city
+            fields: Generated (N, steps) arrays
+        """
+        self.places = list(places)
+        self.time = time
+        self.fields = fields
+        self._columns = None
+        self._dt_txt = [datetime.fromtimestamp(dt, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                        for dt in time.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    @property
+    def rows(self) -> int:
+        return len(self.places) * len(self.time)
+
+    @property
+    def columns(self) -> ForecastColumns:
+        """Formatted forecast for every city as one multi-city ForecastColumns"""
+        if self._columns is None:
+            f = self.fields
+            columns = {
+                'temp': _round(f['temp']), 'feels_like': _round(f['feels_like']),
+                'temp_min': _round(f['temp_min']), 'temp_max': _round(f['temp_max']),
+                'humidity': f['humidity'], 'pressure': f['pressure'],
+                'wind_speed': f['wind_speed'], 'wind_direction': f['wind_direction'], 'wind_gust': f['wind_gust'],
+                'visibility': f['visibility'] / 1000, 'precipitation': f['precipitation']
+            }
+            columns = {name: np.ascontiguousarray(columns[name].ravel(), dtype=INT_FIELDS.get(name, np.float64))
+                       for name in NUMERIC_FIELDS}
+
+            steps = len(self.time)
+            offsets = np.arange(len(self.places) + 1, dtype=np.int64) * steps
+            cities = [self._city(i) for i in range(len(self.places))]
+            self._columns = ForecastColumns(np.tile(self.time, len(self.places)), columns,
+                                            f['condition'].ravel().astype(np.int16), list(CONDITIONS),
+                                            offsets=offsets, cities=cities)
+        return self._columns
+
+    def _city(self, i: int) -> Dict:
+        place = self.places[i]
+        return {
+            'name': place['name'],
+            'country': place['country'],
+            'coord': {'lat': place['lat'], 'lon': place['lon']},
+            'timezone': int(self.fields['timezone'][i])
+        }
+
+    def payload(self, i: int) -> Dict:
+        """
+        Build the /data/2.5/forecast response for city i
+
+        Args:
+            i: City position
+
+        Returns:
+            Raw forecast data, as the API returns it
+        """
+        f = self.fields
+        temp, feels, low, high = (f[name][i].tolist() for name in ('temp', 'feels_like', 'temp_min', 'temp_max'))
+        pressure, humidity, clouds = f['pressure'][i].tolist(), f['humidity'][i].tolist(), f['clouds'][i].tolist()
+        speed, deg, gust = f['wind_speed'][i].tolist(), f['wind_direction'][i].tolist(), f['wind_gust'][i].tolist()
+        visibility, pop, precipitation = f['visibility'][i].tolist(), f['pop'][i].tolist(), f['precipitation'][i].tolist()
+        condition = f['condition'][i].tolist()
+
+        steps = []
+        for k, (dt, dt_txt) in enumerate(zip(self.time.tolist(), self._dt_txt)):
+            category, night = divmod(condition[k], 2)
+            weather_id, main, description, icon = CATEGORIES[category]
+            step = {
+                'dt': dt,
+                'main': {
+                    'temp': temp[k], 'feels_like': feels[k], 'temp_min': low[k], 'temp_max': high[k],
+                    'pressure': pressure[k], 'sea_level': pressure[k], 'grnd_level': pressure[k] - 4,
+                    'humidity': humidity[k], 'temp_kf': 0
+                },
+                'weather': [{'id': weather_id, 'main': main, 'description': description,
+                             'icon': icon + ('n' if night else 'd')}],
+                'clouds': {'all': clouds[k]},
+                'wind': {'speed': speed[k], 'deg': deg[k], 'gust': gust[k]},
+                'visibility': visibility[k],
+                'pop': pop[k],
+                'sys': {'pod': 'n' if night else 'd'},
+                'dt_txt': dt_txt
+            }
+            if precipitation[k]:
+                step['snow' if main == 'Snow' else 'rain'] = {'3h': precipitation[k]}
+            steps.append(step)
+
+        city = self._city(i)
+        city.update(id=i, population=0, sunrise=int(f['sunrise'][i]), sunset=int(f['sunset'][i]))
+        return {'cod': '200', 'message': 0, 'cnt': len(steps), 'list': steps, 'city': city}
+
+    def payloads(self) -> Iterator[Dict]:
+        """Forecast responses for every city, built one at a time"""
+        for i in range(len(self.places)):
+            yield self.payload(i)
+
+    def weather_payload(self, i: int, step: int = 0) -> Dict:
+        """
+        Build the /data/2.5/weather response for city i at one step
+
+        Args:
+            i: City position
+            step: Forecast step used as the current conditions
+
+        Returns:
+            Raw current weather data, as the API returns it
+        """
+        forecast = self.payload(i)
+        entry, city = forecast['list'][step], forecast['city']
+        main = {key: value for key, value in entry['main'].items() if key != 'temp_kf'}
+        data = {
+            'coord': {'lon': city['coord']['lon'], 'lat': city['coord']['lat']},
+            'weather': entry['weather'],
+            'base': 'stations',
+            'main': main,
+            'visibility': entry['visibility'],
+            'wind': entry['wind'],
+            'clouds': entry['clouds'],
+            'dt': entry['dt'],
+            'sys': {'type': 2, 'id': i, 'country': city['country'],
+                    'sunrise': city['sunrise'], 'sunset': city['sunset']},
+            'timezone': city['timezone'],
+            'id': i,
+            'name': city['name'],
+            'cod': 200
+        }
+        for key in ('rain', 'snow'):
+            if key in entry:
+                data[key] = {'1h': round(entry[key]['3h'] / 3, 2)}
+        return data
+
+
+def generate_forecast(places: Union[int, Sequence[Dict]], days: int = 5,
+                      seed: Optional[int] = None, start: Optional[float] = None) -> SyntheticForecast:
+    """
+    Generate 3-hourly weather for many cities in one vectorized pass
+
+    Temperatures follow latitude, season and a diurnal cycle peaking mid
+    afternoon in local solar time. A few slow pressure waves per city
+    stand in for passing fronts: falling pressure brings cloud, wind and
+    mild air, low pressure brings precipitation (snow below freezing,
+    thunderstorms when warm), and clear calm nights cool down further.
+
+    Args:
+        places: Number of places from the offline gazetteer, or place
+                dictionaries with name, country, lat and lon
+        days: Days per city (8 steps each)
+        seed: Random seed; the same seed gives the same weather
+        start: First step as Unix seconds (defaults to the next 3-hour boundary)
+
+    Returns:
+        SyntheticForecast for every place
+    """
+    if isinstance(places, int):
+        places = default_places(places)
+
+    rng = np.random.default_rng(seed)
+    n, steps = len(places), days * STEPS_PER_DAY
+    start = _next_step(_time.time()) if start is None else int(start)
+    time = start + np.arange(steps, dtype=np.int64) * STEP
+
+    lat = np.array([place['lat'] for place in places], dtype=np.float64)[:, None]
+    lon = np.array([place['lon'] for place in places], dtype=np.float64)[:, None]
+    days_since_epoch = time / 86400.0
+
+    # Climate: annual mean by latitude, seasonal swing peaking mid-July
+    # (mid-January south of the equator), some places more continental
+    day_of_year = (days_since_epoch % 365.2425)[None, :]
+    annual = 27.0 - 0.4 * np.maximum(np.abs(lat) - 12.0, 0.0)
+    swing = 0.16 * np.abs(lat) * rng.uniform(0.8, 1.3, (n, 1))
+    seasonal = swing * np.cos(2 * np.pi * (day_of_year - 197) / 365.2425) * np.sign(lat)
+
+    # Fronts: a few slow pressure waves with random periods and phases
+    periods = rng.uniform(2.0, 7.0, (n, 3, 1))
+    phases = rng.uniform(0, 2 * np.pi, (n, 3, 1))
+    weights = rng.uniform(0.5, 1.0, (n, 3, 1))
+    angle = 2 * np.pi * days_since_epoch[None, None, :] / periods + phases
+    synoptic = np.clip((weights * np.sin(angle)).sum(axis=1) / weights.sum(axis=1) * 1.6, -1.0, 1.0)
+    tendency = (weights * np.cos(angle) * 2 * np.pi / periods).sum(axis=1) / weights.sum(axis=1)
+    tendency = np.clip(tendency / 1.5, -1.0, 1.0)  # pressure change per day, roughly -1 .. 1
+
+    clouds = np.clip(0.45 - 0.5 * synoptic - 0.3 * tendency + rng.normal(0, 0.12, (n, steps)), 0.0, 1.0)
+
+    # Diurnal cycle in local solar time, damped under cloud
+    solar_hour = ((time % 86400) / 3600.0)[None, :] + lon / 15.0
+    night = (np.mod(solar_hour - 6.0, 24.0) >= 12.0)
+    diurnal = rng.uniform(2.5, 5.5, (n, 1)) * (1.0 - 0.6 * clouds) * np.cos(2 * np.pi * (solar_hour - 15.0) / 24.0)
+
+    # Fronts swing temperature most at mid latitudes
+    frontal = np.clip(np.abs(lat) / 35.0, 0.2, 1.0)
+    temp = annual + seasonal + diurnal - 2.5 * frontal * tendency + rng.normal(0, 0.4, (n, steps))
+
+    # Precipitation under thick cloud and low pressure, heavier when warm
+    pop = np.clip((clouds - 0.6) * 2.5, 0.0, 1.0)
+    wet = rng.random((n, steps)) < pop
+    amount = rng.gamma(0.8, 0.8, (n, steps)) * (1.0 + np.maximum(-synoptic, 0.0))
+    amount *= 1.0 + np.clip(temp - 20.0, 0.0, 15.0) / 5.0
+    precipitation = np.where(wet, np.round(np.maximum(amount, 0.1), 2), 0.0)
+
+    wind_speed = (1.5 + 5.0 * np.abs(tendency) + 2.0 * np.maximum(-synoptic, 0.0)) * np.where(night, 0.7, 1.0)
+    wind_speed = np.round(np.clip(wind_speed + rng.gamma(2.0, 0.6, (n, steps)), 0.2, 30.0), 2)
+    wind_gust = np.round(wind_speed * rng.uniform(1.2, 1.8, (n, steps)), 2)
+    prevailing = rng.uniform(0, 360, (n, 1))
+    wind_direction = np.mod(prevailing + 70.0 * tendency + rng.normal(0, 20, (n, steps)), 360).astype(np.int16)
+
+    humidity = np.clip(60 + 30 * clouds - 2.0 * diurnal + 10 * wet + rng.normal(0, 4, (n, steps)),
+                       15, 100).astype(np.int16)
+    pressure = np.round(1013 + 14 * synoptic + rng.normal(0, 1.0, (n, steps))).astype(np.int16)
+
+    fog = (humidity >= 95) & (wind_speed < 3.0) & ~wet
+    visibility = np.where(wet, 10000 - np.minimum(precipitation * 1500, 8000), 10000)
+    visibility = np.where(fog, rng.integers(200, 1000, (n, steps)), visibility).astype(np.int64)
+
+    # Apparent temperature: wind chill when cold, humidity when hot
+    feels_like = np.where(temp < 10, temp - 0.7 * wind_speed,
+                          np.where(temp > 26, temp + 0.1 * (humidity - 40), temp))
+    spread = np.abs(rng.normal(0, 0.6, (n, steps)))
+
+    category = np.select(
+        [fog,
+         wet & (temp < 0.5) & (precipitation >= 1.0), wet & (temp < 0.5),
+         wet & (temp > 18) & (precipitation >= 3.0), wet & (precipitation >= 4.0),
+         wet & (precipitation >= 1.0), wet,
+         clouds < 0.12, clouds < 0.3, clouds < 0.55, clouds < 0.85],
+        [11, 10, 9, 8, 7, 6, 5, 0, 1, 2, 3],
+        default=4
+    )
+
+    # Sunrise and sunset of the first day from the solar declination
+    first_day = (day_of_year[0, 0] + 10) % 365.2425
+    declination = np.radians(-23.44) * np.cos(2 * np.pi * first_day / 365.2425)
+    cos_hour = np.clip(-np.tan(np.radians(lat[:, 0])) * np.tan(declination), -1.0, 1.0)
+    half_day = np.degrees(np.arccos(cos_hour)) / 15.0 * 3600
+    noon = (start // 86400) * 86400 + (12.0 - lon[:, 0] / 15.0) * 3600
+
+    fields = {
+        'temp': np.round(temp, 2),
+        'feels_like': np.round(feels_like, 2),
+        'temp_min': np.round(temp - spread, 2),
+        'temp_max': np.round(temp + spread, 2),
+        'humidity': humidity,
+        'pressure': pressure,
+        'wind_speed': wind_speed,
+        'wind_direction': wind_direction,
+        'wind_gust': wind_gust,
+        'visibility': visibility,
+        'precipitation': precipitation,
+        'clouds': np.round(clouds * 100).astype(np.int16),
+        'pop': np.round(pop, 2),
+        'condition': (category * 2 + night).astype(np.int16),
+        'timezone': np.round(lon[:, 0] / 15.0).astype(np.int64) * 3600,
+        'sunrise': (noon - half_day).astype(np.int64),
+        'sunset': (noon + half_day).astype(np.int64)
+    }
+    return SyntheticForecast(places, time, fields)
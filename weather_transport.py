@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Weather Transport Module
+Pooled, keep-alive HTTP transport shared by all WeatherAPI calls
+"""
+
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class WeatherTransport:
+    """Pooled HTTP transport with connection reuse and retry/backoff"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size: int = 10, max_retries: int = 3,
+                 backoff_factor: float = 0.5, pool_block: bool = False,
+                 status_retries: bool = True):
+        """
+        Create a pooled transport
+
+        Args:
+            pool_size: Maximum number of keep-alive connections kept per host
+            max_retries: Retries for connection errors and retryable statuses
+            backoff_factor: Exponential backoff factor between retries (seconds)
+            pool_block: Block when the pool is exhausted instead of opening
+                        extra throwaway connections
+            status_retries: Re-send on retryable statuses; turn off when the
+                            caller retries them itself, e.g. to meter each attempt
+        """
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.status_retries = status_retries
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries if status_retries else 0,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES if status_retries else (),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+            pool_block=pool_block
+        )
+
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+        self._lock = threading.Lock()
+        self._requests_by_host: Dict[str, int] = {}
+
+    def get(self, url: str, params: Optional[Dict] = None, timeout: float = 10) -> requests.Response:
+        """
+        Issue a GET request over the pooled session
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: Request timeout in seconds
+
+        Returns:
+            Response object
+        """
+        host = requests.utils.urlparse(url).hostname or ''
+        with self._lock:
+            self._requests_by_host[host] = self._requests_by_host.get(host, 0) + 1
+
+        return self.session.get(url, params=params, timeout=timeout)
+
+    def connection_stats(self) -> Dict[str, Dict]:
+        """
+        Get per-host connection reuse statistics
+
+        Returns:
+            Dictionary keyed by host with logical calls, wire requests
+            (including retries), opened connections and reuse counts
+        """
+        stats = {}
+
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            entry = stats.setdefault(pool.host, {'calls': 0, 'requests': 0, 'connections': 0})
+            entry['requests'] += pool.num_requests
+            entry['connections'] += pool.num_connections
+
+        with self._lock:
+            calls = dict(self._requests_by_host)
+
+        for host, count in calls.items():
+            entry = stats.setdefault(host, {'calls': 0, 'requests': 0, 'connections': 0})
+            entry['calls'] = count
+
+        for entry in stats.values():
+            entry['reused'] = max(entry['requests'] - entry['connections'], 0)
+            entry['reuse_ratio'] = entry['reused'] / entry['requests'] if entry['requests'] else 0.0
+
+        return stats
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
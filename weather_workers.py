@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Weather Workers Module
+Fixed worker pool for UI clients where only the latest request per slot matters
+"""
+
+import itertools
+import queue
+import threading
+from typing import Dict, Hashable, List, Tuple
+
+from weather_ratelimit import INTERACTIVE, priority
+
+
+class WorkerPool:
+    """
+    Daemon worker threads fed by one request queue
+
+    Every task belongs to a slot (e.g. 'weather' or 'forecast'). Submitting
+    to a slot supersedes its earlier tasks: queued ones are skipped and the
+    results of running ones are dropped, so only the latest is delivered.
+    Results are collected by the UI thread with drain(). Queued tasks run
+    in priority order, so background refreshes never delay a search, and
+    each task runs under weather_ratelimit.priority(level), so its API calls
+    queue at the rate limiter with that priority too:
+
+    >>> import threading
+    >>> from weather_ratelimit import BACKGROUND, request_priority
+    >>> pool = WorkerPool(workers=1)
+    >>> busy, order = threading.Event(), []
+    >>> _ = pool.submit('busy', busy.wait)
+    >>> _ = pool.submit(('pinned', 'London,GB', 'weather'), lambda: order.append(('refresh', request_priority.get())),
+    ...                 level=BACKGROUND)
+    >>> _ = pool.submit('weather', lambda: order.append(('search', request_priority.get())))
+    >>> busy.set(); pool.close()
+    >>> for thread in pool.threads:
+    ...     thread.join()
+    >>> order
+    [('search', 0), ('refresh', 10)]
+    """
+
+    def __init__(self, workers: int = 3):
+        """
+        Args:
+            workers: Number of worker threads
+        """
+        self._tasks = queue.PriorityQueue()
+        self._results = queue.SimpleQueue()
+        self._latest: Dict[Hashable, int] = {}
+        self._generation = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.skipped = 0
+        self.discarded = 0
+
+        self.threads = [threading.Thread(target=self._work, name=f"weather-worker-{i}", daemon=True)
+                        for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, slot: Hashable, fn, *args, level: int = INTERACTIVE) -> int:
+        """
+        Queue fn(*args) as the latest task for a slot
+
+        Args:
+            slot: What the result is for; newer tasks supersede older ones
+            fn: Blocking function to run on a worker thread
+            level: Priority, lower runs first (INTERACTIVE or BACKGROUND)
+
+        Returns:
+            Generation number of the task
+        """
+        with self._lock:
+            generation = next(self._generation)
+            self._latest[slot] = generation
+            self.submitted += 1
+
+        self._tasks.put((level, generation, slot, fn, args))
+        return generation
+
+    def is_current(self, slot: Hashable, generation: int) -> bool:
+        """Whether a task is still the latest one for its slot"""
+        return self._latest.get(slot) == generation
+
+    def _work(self):
+        while True:
+            level, generation, slot, fn, args = self._tasks.get()
+            if fn is None:
+                return
+
+            if not self.is_current(slot, generation):
+                with self._lock:
+                    self.skipped += 1
+                continue
+
+            try:
+                with priority(level):
+                    result, error = fn(*args), None
+            except Exception as e:
+                result, error = None, e
+
+            self._results.put((slot, generation, result, error))
+
+    def drain(self) -> List[Tuple[Hashable, object, Exception]]:
+        """
+        Collect every finished task, keeping only the latest per slot
+
+        Call this from the UI thread and apply the whole batch at once.
+
+        Returns:
+            List of (slot, result, error) tuples; error is None on success
+        """
+        latest = {}
+        while True:
+            try:
+                slot, generation, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if self.is_current(slot, generation):
+                latest[slot] = (result, error)
+                self.completed += 1
+            else:
+                self.discarded += 1
+
+        return [(slot, result, error) for slot, (result, error) in latest.items()]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get task counters
+
+        Returns:
+            Dictionary with submitted, completed, skipped (superseded before
+            running), discarded (superseded while running) and queued counts
+        """
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'skipped': self.skipped,
+            'discarded': self.discarded,
+            'queued': self._tasks.qsize()
+        }
+
+    def close(self):
+        """Stop the workers once the queued tasks are done"""
+        for _ in self.threads:
+            self._tasks.put((float('inf'), next(self._generation), None, None, ()))